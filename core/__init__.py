@@ -12,5 +12,19 @@ DATA_FOLDER = os.getenv("DATA_FOLDER")
 DATABASE_URL = os.getenv("DATABASE_URL")
 API_KEY = os.getenv("API_KEY")
 
+# Control de admisión de endpoints pesados, por clase: "load=1,backup=1,report=2"
+ADMISSION_CONCURRENCY = os.getenv("ADMISSION_CONCURRENCY", "load=1,backup=1,report=2")
+ADMISSION_QUEUE_SIZE = os.getenv("ADMISSION_QUEUE_SIZE", "load=2,backup=4,report=8")
+ADMISSION_TIMEOUT = float(os.getenv("ADMISSION_TIMEOUT", "30"))
+
+# Pool de conexiones separado para cargas, backups/restores y reportes
+# (vacío: se calcula desde ADMISSION_CONCURRENCY, ver admission.heavy_pool_size)
+HEAVY_DB_POOL_SIZE = int(os.getenv("HEAVY_DB_POOL_SIZE") or 0) or None
+HEAVY_DB_POOL_TIMEOUT = float(os.getenv("HEAVY_DB_POOL_TIMEOUT", "30"))
+
 # Re-exportar dependencias
-__all__ = ["Session", "HTTPException", "DATA_FOLDER", "DATABASE_URL", "API_KEY"]
\ No newline at end of file
+__all__ = [
+    "Session", "HTTPException", "DATA_FOLDER", "DATABASE_URL", "API_KEY",
+    "ADMISSION_CONCURRENCY", "ADMISSION_QUEUE_SIZE", "ADMISSION_TIMEOUT",
+    "HEAVY_DB_POOL_SIZE", "HEAVY_DB_POOL_TIMEOUT"
+]
\ No newline at end of file
@@ -0,0 +1,149 @@
+# benchmark_crud.py
+"""
+Micro-benchmark of the single-row CRUD functions: statements and latency per call.
+
+Runs create/get/update/delete of employees, departments and jobs against a fresh
+SQLite database, one session per call (like a request), and records every
+statement sent to the database. Statements on the entity table are the data
+round trips; the rest are the bookkeeping writes of the same transaction
+(table version for the ETags, change log and, for employees, the name index).
+
+Statement counts are deterministic, so they are compared exactly against the
+checked-in baseline (scripts/baselines/crud.json); latency is only reported.
+
+Usage:
+    python scripts/benchmark_crud.py
+    python scripts/benchmark_crud.py --calls 2000
+    python scripts/benchmark_crud.py --update-baseline
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmark_utils import setup_paths, use_sqlite, load_baseline, save_baseline
+
+BASELINE_NAME = "crud"
+BOOKKEEPING_TABLES = ("table_versions", "change_log", "employee_search")
+OPERATIONS = ("create", "get", "update", "delete")
+
+def _payloads():
+    from models import EmployeeCreate, DepartmentCreate, JobCreate
+
+    return {
+        "employee": lambda i: EmployeeCreate(name=f"Employee {i}", datetime="2021-07-27T16:02:08Z",
+                                             department_id=1, job_id=1),
+        "department": lambda i: DepartmentCreate(department=f"Department {i}"),
+        "job": lambda i: JobCreate(job=f"Job {i}"),
+    }
+
+def _functions(entity):
+    import crud
+
+    return {operation: getattr(crud, f"{operation}_{entity}") for operation in OPERATIONS}
+
+def _kind(statement: str) -> str:
+    lowered = statement.lower()
+    return "bookkeeping" if any(table in lowered for table in BOOKKEEPING_TABLES) else "data"
+
+class StatementCounter:
+    """Counts the statements and commits sent through an engine, by kind."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.counts = Counter()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.counts[_kind(statement)] += 1
+
+    def _on_commit(self, conn):
+        self.counts["commit"] += 1
+
+    def take(self) -> Counter:
+        counts, self.counts = self.counts, Counter()
+        return counts
+
+def run(calls: int) -> dict:
+    from database import SessionLocal, engine, init_db
+
+    init_db()
+    counter = StatementCounter(engine)
+    payloads = _payloads()
+    results = {}
+
+    for entity, payload in payloads.items():
+        functions = _functions(entity)
+        ids = []
+        for operation in OPERATIONS:
+            samples = []
+            totals = Counter()
+            for i in range(calls):
+                if operation == "create":
+                    args = (payload(i),)
+                elif operation == "update":
+                    args = (ids[i], payload(i + calls))
+                else:
+                    args = (ids[i],)
+                counter.take()
+                start = time.perf_counter()
+                with SessionLocal() as db:
+                    result = functions[operation](db, *args)
+                    if operation == "create":
+                        ids.append(result.id)  # se lee dentro de la sesión: no depende de expire_on_commit
+                samples.append(time.perf_counter() - start)
+                totals += counter.take()
+
+            per_call = {kind: round(totals[kind] / calls, 2) for kind in ("data", "bookkeeping", "commit")}
+            results[f"{operation}_{entity}"] = {"statements": per_call,
+                                                "median_ms": round(statistics.median(samples) * 1000, 3)}
+            print(f"  {operation + '_' + entity:<18} data {per_call['data']:<5} bookkeeping "
+                  f"{per_call['bookkeeping']:<5} commit {per_call['commit']:<5} "
+                  f"{results[f'{operation}_{entity}']['median_ms']:.3f} ms")
+    return results
+
+def compare(current: dict, baseline: dict) -> list:
+    failures = []
+    for name, result in current.items():
+        base = baseline.get("operations", {}).get(name)
+        if base is None:
+            continue
+        for kind, count in result["statements"].items():
+            if count > base["statements"].get(kind, 0):
+                failures.append(f"{name}: {count} {kind} statements per call (baseline {base['statements'][kind]})")
+    return failures
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="Calls per operation")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    args = parser.parse_args()
+
+    db_dir = Path(tempfile.mkdtemp(prefix="crud_benchmark_"))
+    use_sqlite(db_dir / "app.db")
+    setup_paths()
+
+    print(f"{args.calls} calls per operation (statements per call, median latency)")
+    current = run(args.calls)
+
+    if args.update_baseline:
+        print(f"Baseline written to {save_baseline(BASELINE_NAME, {'operations': current})}")
+        return 0
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline is None:
+        print("No baseline recorded yet, run with --update-baseline")
+        return 0
+
+    failures = compare(current, baseline)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# benchmark_logging.py
+"""
+Per-request logging overhead: synchronous handlers vs. the queue-based JSON pipeline.
+
+"before" reproduces the previous setup: RotatingFileHandler + stdout handler writing on the
+request thread, with eager f-strings (including the full payload at INFO).
+"after" uses logger.py: records are queued with their message rendered, and a listener thread
+formats them as JSON and writes them.
+
+Only the time spent on the calling (request) thread is measured; the drain time of the
+queue is reported separately. Console output goes to os.devnull.
+
+Usage:
+    python scripts/benchmark_logging.py --requests 20000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from benchmark_utils import setup_paths
+
+PAYLOAD = {"name": "Harold Vogt", "datetime": "2021-11-07T02:48:42Z", "department_id": 2, "job_id": 96}
+
+def before_request(log, page, limit, payload):
+    """Logging calls of a request as main.py made them (f-strings, payload at INFO)."""
+    log.info(f"Attempting to create employee: {dict(payload)}")
+    log.debug(f"Employee created successfully: ID {page}")
+    log.info(f"Fetching employees - Page: {page}, Limit: {limit}")
+    log.debug(f"Found {limit} employees")
+
+def after_request(log, page, limit, payload):
+    """Same calls with lazy %-formatting and the payload at DEBUG."""
+    log.info("Attempting to create employee")
+    log.debug("Employee payload: %s", payload)
+    log.info("Fetching employees - Page: %s, Limit: %s", page, limit)
+    log.debug("Found %s employees", limit)
+
+def run(request_fn, log, requests):
+    start = time.perf_counter()
+    for i in range(requests):
+        request_fn(log, i, 50, PAYLOAD)
+    return time.perf_counter() - start
+
+def bench_before(log_dir: Path, devnull, requests):
+    from logger import LOG_FORMAT, DATE_FORMAT
+
+    log = logging.getLogger("bench.before")
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+    file_handler = RotatingFileHandler(log_dir / "before.log", maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+    console_handler = logging.StreamHandler(devnull)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+        log.addHandler(handler)
+
+    seconds = run(before_request, log, requests)
+    for handler in (file_handler, console_handler):
+        log.removeHandler(handler)
+        handler.close()
+    return seconds, 0.0
+
+def bench_after(log_dir: Path, devnull, requests):
+    import logger as app_logging
+
+    app_logging.stop_logging()
+    formatter = app_logging.JsonFormatter()
+    file_handler = RotatingFileHandler(log_dir / "after.log", maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+    console_handler = logging.StreamHandler(devnull)
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    app_logging.start_logging(handlers=[file_handler, console_handler])
+
+    seconds = run(after_request, app_logging.setup_logger("app.bench"), requests)
+    dropped = app_logging.dropped_records()
+    start = time.perf_counter()
+    app_logging.stop_logging()  # espera a que el listener vacíe la cola
+    drain = time.perf_counter() - start
+    file_handler.close()
+    if dropped:
+        print(f"after: {dropped} records dropped (queue full, LOG_QUEUE_SIZE={app_logging.LOG_QUEUE_SIZE})")
+    return seconds, drain
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Simulated requests")
+    args = parser.parse_args()
+
+    log_dir = Path(tempfile.mkdtemp(prefix="logging_benchmark_"))
+    os.environ["LOG_DIR"] = str(log_dir)
+    # Cola con lugar para todos los registros: se mide el costo por llamada, no los descartes
+    os.environ["LOG_QUEUE_SIZE"] = str(args.requests * 4)
+    setup_paths()
+
+    with open(os.devnull, "w") as devnull:
+        for name, bench in (("before", bench_before), ("after", bench_after)):
+            seconds, drain = bench(log_dir, devnull, args.requests)
+            per_request = seconds / args.requests * 1e6
+            print(f"{name:<7} {per_request:8.2f} µs/request on the request thread"
+                  + (f"  (queue drained in {drain:.2f}s)" if drain else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# benchmark_reports.py
+"""
+Benchmark of the report queries with EXPLAIN QUERY PLAN capture.
+
+Seeds a local SQLite database with synthetic hires, times `hired_employees_by_quarter`
+and `departments_above_average`, and records the plan of every statement they run.
+Exits with code 1 when the runtime or the plan shape regresses against the
+checked-in baseline (scripts/baselines/report_queries.json).
+
+Usage:
+    python scripts/benchmark_reports.py                        # 10k, 1M and 10M rows
+    python scripts/benchmark_reports.py --sizes 10000 1000000
+    python scripts/benchmark_reports.py --update-baseline
+"""
+import argparse
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmark_utils import setup_paths, use_sqlite, time_call, load_baseline, save_baseline, check_runtime
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+BASELINE_NAME = "report_queries"
+DEPARTMENTS = 12
+JOBS = 183
+SEED_BATCH = 100_000
+
+def generate_hires(rows: int, seed: int = 42):
+    """Synthetic hires spread over 2020-2022 (about a third of them in 2021)."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    span = int(timedelta(days=3 * 365).total_seconds())
+    for i in range(1, rows + 1):
+        hired_at = start + timedelta(seconds=rng.randrange(span))
+        yield (i, f"Employee {i}", hired_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+               rng.randint(1, DEPARTMENTS), rng.randint(1, JOBS))
+
+def seed_database(engine, rows: int) -> None:
+    """Creates the schema and fills it, reusing the file if it already has `rows` hires."""
+    from sqlalchemy import text
+    from models import Base
+
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT COUNT(*) FROM hired_employees")).scalar() == rows:
+            return
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("PRAGMA journal_mode=OFF")
+        cur.execute("PRAGMA synchronous=OFF")
+        for table in ("hired_employees", "departments", "jobs"):
+            cur.execute(f"DELETE FROM {table}")
+        cur.executemany("INSERT INTO departments (id, department) VALUES (?, ?)",
+                        [(i, f"Department {i}") for i in range(1, DEPARTMENTS + 1)])
+        cur.executemany("INSERT INTO jobs (id, job) VALUES (?, ?)",
+                        [(i, f"Job {i}") for i in range(1, JOBS + 1)])
+
+        batch = []
+        for row in generate_hires(rows):
+            batch.append(row)
+            if len(batch) == SEED_BATCH:
+                cur.executemany("INSERT INTO hired_employees (id, name, datetime, department_id, job_id) "
+                                "VALUES (?, ?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            cur.executemany("INSERT INTO hired_employees (id, name, datetime, department_id, job_id) "
+                            "VALUES (?, ?, ?, ?, ?)", batch)
+        raw.commit()
+    finally:
+        raw.close()
+
+def capture_statements(engine, fn):
+    """Runs fn once and returns the (statement, parameters) pairs it sent to the database."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+def explain_plans(engine, statements):
+    """EXPLAIN QUERY PLAN of each statement, reduced to its list of plan steps."""
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plans.append([" ".join(str(row[3]).split()) for row in rows])
+    return plans
+
+def run_size(db_dir: Path, rows: int, repeat: int) -> dict:
+    from sqlalchemy import create_engine
+    from scripts import queries
+
+    engine = create_engine(f"sqlite:///{db_dir / f'reports_{rows}.db'}")
+    print(f"Seeding {rows:,} hires...")
+    seed_database(engine, rows)
+    queries.SessionLocal.configure(bind=engine)
+
+    results = {}
+    for report in (queries.hired_employees_by_quarter, queries.departments_above_average):
+        statements = capture_statements(engine, report)  # también sirve de warm-up
+        seconds = time_call(report, repeat)
+        results[report.__name__] = {"seconds": round(seconds, 6), "plans": explain_plans(engine, statements)}
+        print(f"  {report.__name__:<28} {seconds:.4f}s  ({len(statements)} statements)")
+    engine.dispose()
+    return results
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for size, reports in current.items():
+        base_reports = baseline.get("sizes", {}).get(size)
+        if base_reports is None:
+            print(f"No baseline for {size} rows, skipping comparison")
+            continue
+        for name, result in reports.items():
+            base = base_reports.get(name)
+            if base is None:
+                continue
+            label = f"{name} @ {size} rows"
+            failures += check_runtime(label, result["seconds"], base["seconds"], tolerance)
+            if result["plans"] != base["plans"]:
+                failures.append(f"{label}: query plan changed\n    baseline: {base['plans']}\n    current:  {result['plans']}")
+    return failures
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Number of hires to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per report (median is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--db-dir", type=Path, default=Path(tempfile.gettempdir()) / "report_benchmark",
+                        help="Where the seeded SQLite files are kept between runs")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    args = parser.parse_args()
+
+    args.db_dir.mkdir(parents=True, exist_ok=True)
+    use_sqlite(args.db_dir / "app.db")  # `database.engine` no se usa, los reportes se re-enlazan por tamaño
+    setup_paths()
+
+    current = {str(rows): run_size(args.db_dir, rows, args.repeat) for rows in args.sizes}
+
+    if args.update_baseline:
+        baseline = load_baseline(BASELINE_NAME) or {"sizes": {}}
+        baseline["sizes"].update(current)
+        print(f"Baseline written to {save_baseline(BASELINE_NAME, baseline)}")
+        return 0
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline is None:
+        print("No baseline recorded yet, run with --update-baseline")
+        return 0
+
+    failures = compare(current, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
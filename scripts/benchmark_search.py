@@ -0,0 +1,134 @@
+# benchmark_search.py
+"""
+Benchmark of the employee name search on SQLite.
+
+Seeds a local SQLite database with synthetic employees whose names share a few very
+common first and last names, so terms like "Mar" or "Lopez" match a large part of the
+table. Times `search_employees` for each query and records the plan of every statement
+it runs. Exits with code 1 when a query is slower, or its plan changes, compared to the
+checked-in baseline (scripts/baselines/search.json).
+
+Usage:
+    python scripts/benchmark_search.py                        # 1M rows
+    python scripts/benchmark_search.py --sizes 10000 1000000
+    python scripts/benchmark_search.py --update-baseline
+"""
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmark_utils import setup_paths, use_sqlite, time_call, load_baseline, save_baseline, check_runtime
+
+DEFAULT_SIZES = [1_000_000]
+BASELINE_NAME = "search"
+SEED_BATCH = 100_000
+FIRST_NAMES = ["Maria", "Mario", "Marco", "Ana", "Luis", "Jose", "Carmen", "Pedro", "Lucia", "Jorge"]
+LAST_NAMES = ["Lopez", "Martinez", "Garcia", "Quispe", "Rojas", "Perez", "Marin", "Torres"]
+
+# Prefijo muy frecuente, apellido frecuente, nombre completo y un error de tipeo (etapa difusa)
+QUERIES = ["Mar", "Maria", "Lopez", "Quispe Rojas", "Qispe"]
+
+def generate_names(rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    for i in range(1, rows + 1):
+        yield i, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+def seed_database(engine, rows: int) -> None:
+    """Creates the schema and the search index, reusing the file if it already has `rows` employees."""
+    from sqlalchemy import text
+    from models import Base
+    from search import create_search_index, rebuild_search_index
+
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        create_search_index(conn)
+        if conn.execute(text("SELECT COUNT(*) FROM hired_employees")).scalar() == rows:
+            return
+        conn.execute(text("DELETE FROM hired_employees"))
+        batch = []
+        for employee_id, name in generate_names(rows):
+            batch.append({"id": employee_id, "name": name})
+            if len(batch) == SEED_BATCH:
+                conn.execute(text("INSERT INTO hired_employees (id, name, datetime, department_id, job_id) "
+                                  "VALUES (:id, :name, '2021-01-01T00:00:00Z', 1, 1)"), batch)
+                batch = []
+        if batch:
+            conn.execute(text("INSERT INTO hired_employees (id, name, datetime, department_id, job_id) "
+                              "VALUES (:id, :name, '2021-01-01T00:00:00Z', 1, 1)"), batch)
+        rebuild_search_index(conn)
+
+def run_size(db_dir: Path, rows: int, repeat: int) -> dict:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from benchmark_reports import capture_statements, explain_plans
+    from search import search_employees
+
+    engine = create_engine(f"sqlite:///{db_dir / f'search_{rows}.db'}")
+    print(f"Seeding {rows:,} employees...")
+    seed_database(engine, rows)
+
+    results = {}
+    with Session(engine) as db:
+        for q in QUERIES:
+            def search():
+                return search_employees(db, q, limit=20)
+            statements = capture_statements(engine, search)  # también sirve de warm-up
+            seconds = time_call(search, repeat)
+            results[q] = {"seconds": round(seconds, 6), "plans": explain_plans(engine, statements)}
+            print(f"  {q:<14} {seconds * 1000:8.2f} ms  ({len(statements)} statements)")
+    engine.dispose()
+    return results
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for size, queries in current.items():
+        base_queries = baseline.get("sizes", {}).get(size)
+        if base_queries is None:
+            print(f"No baseline for {size} rows, skipping comparison")
+            continue
+        for q, result in queries.items():
+            base = base_queries.get(q)
+            if base is None:
+                continue
+            label = f"search {q!r} @ {size} rows"
+            failures += check_runtime(label, result["seconds"], base["seconds"], tolerance)
+            if result["plans"] != base["plans"]:
+                failures.append(f"{label}: query plan changed\n    baseline: {base['plans']}\n    current:  {result['plans']}")
+    return failures
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Number of employees to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query (median is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--db-dir", type=Path, default=Path(tempfile.gettempdir()) / "search_benchmark",
+                        help="Where the seeded SQLite files are kept between runs")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    args = parser.parse_args()
+
+    args.db_dir.mkdir(parents=True, exist_ok=True)
+    use_sqlite(args.db_dir / "app.db")  # `database.engine` no se usa, la búsqueda recibe su sesión
+    setup_paths()
+
+    current = {str(rows): run_size(args.db_dir, rows, args.repeat) for rows in args.sizes}
+
+    if args.update_baseline:
+        baseline = load_baseline(BASELINE_NAME) or {"sizes": {}}
+        baseline["sizes"].update(current)
+        print(f"Baseline written to {save_baseline(BASELINE_NAME, baseline)}")
+        return 0
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline is None:
+        print("No baseline recorded yet, run with --update-baseline")
+        return 0
+
+    failures = compare(current, baseline, args.tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
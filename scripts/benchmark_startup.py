@@ -0,0 +1,112 @@
+# benchmark_startup.py
+"""
+Cold-start benchmark of the API: import time of `main` and time to the first request.
+
+Every run happens in a fresh interpreter (subprocess) against a migrated SQLite file, so
+nothing is cached between runs. Exits with code 1 when the median times regress against
+the checked-in baseline (scripts/baselines/startup.json) or when importing the API loads
+one of the heavy ingestion/backup libraries (pandas, fastavro, pyarrow).
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 10
+    python scripts/benchmark_startup.py --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmark_utils import ROOT_DIR, use_sqlite, load_baseline, save_baseline, check_runtime
+
+BASELINE_NAME = "startup"
+HEAVY_MODULES = ["pandas", "fastavro", "pyarrow"]
+# Diferencia absoluta mínima para reportar una regresión (ruido de milisegundos);
+# muy por debajo del 25% de un arranque de ~0.6s, así no afloja el umbral relativo
+MIN_DELTA = 0.05
+
+# Se ejecuta en un intérprete nuevo; imprime una línea JSON con las mediciones
+CHILD_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+loaded = [name for name in {heavy!r} if name in sys.modules]
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    status = client.get("/departments/", headers={{"X-API-KEY": "benchmark"}}).status_code
+first_request = time.perf_counter()
+print(json.dumps({{"import_seconds": imported - start, "first_request_seconds": first_request - start,
+                  "status": status, "heavy_modules": loaded}}))
+"""
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env["API_KEY"] = "benchmark"
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT_DIR / "src"), str(ROOT_DIR), str(ROOT_DIR / "scripts")])
+    return env
+
+def migrate(env: dict) -> None:
+    subprocess.run([sys.executable, str(ROOT_DIR / "src" / "migrate.py")], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+def run_once(env: dict, workdir: Path) -> dict:
+    code = CHILD_CODE.format(heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], env=env, cwd=workdir, check=True,
+                            capture_output=True, text=True).stdout
+    # La última línea es el resultado; lo anterior son logs de la aplicación
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Cold starts to measure (median is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the results as the new baseline")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="startup_benchmark_"))
+    use_sqlite(workdir / "app.db")
+    os.environ["LOG_DIR"] = str(workdir / "logs")
+    env = child_env()
+    migrate(env)
+
+    samples = [run_once(env, workdir) for _ in range(args.runs)]
+    statuses = {sample["status"] for sample in samples}
+    current = {
+        "import_seconds": round(statistics.median(s["import_seconds"] for s in samples), 4),
+        "first_request_seconds": round(statistics.median(s["first_request_seconds"] for s in samples), 4),
+    }
+    heavy = sorted({name for sample in samples for name in sample["heavy_modules"]})
+    print(f"import main           {current['import_seconds']:.4f}s")
+    print(f"first request         {current['first_request_seconds']:.4f}s  (status {', '.join(map(str, statuses))})")
+
+    failures = []
+    if heavy:
+        failures.append(f"importing main loaded {', '.join(heavy)}")
+    if statuses != {200}:
+        failures.append(f"first request returned {statuses}")
+
+    if args.update_baseline:
+        if failures:
+            print("\n".join(f"ERROR {failure}" for failure in failures))
+            return 1
+        print(f"Baseline written to {save_baseline(BASELINE_NAME, current)}")
+        return 0
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline is None:
+        print("No baseline recorded yet, run with --update-baseline")
+    else:
+        for key, seconds in current.items():
+            failures += check_runtime(key, seconds, baseline[key], args.tolerance, min_delta=MIN_DELTA)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
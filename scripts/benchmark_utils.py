@@ -0,0 +1,66 @@
+# benchmark_utils.py
+"""Helpers shared by the benchmark scripts: import paths, timing and checked-in baselines."""
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+BASELINE_DIR = ROOT_DIR / "scripts" / "baselines"
+
+def setup_paths() -> None:
+    """Makes `src/` and the project root importable, like the Docker image does."""
+    for path in (ROOT_DIR / "src", ROOT_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+def use_sqlite(db_path: Path) -> str:
+    """Points DATABASE_URL at a local SQLite file (must run before importing `database`)."""
+    url = f"sqlite:///{db_path}"
+    os.environ["DATABASE_URL"] = url
+    return url
+
+def time_call(fn: Callable, repeat: int = 3) -> float:
+    """Median wall time in seconds of `repeat` calls to fn."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def load_baseline(name: str) -> Optional[dict]:
+    """Reads scripts/baselines/<name>.json, or None if it was never recorded."""
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(name: str, data: dict) -> Path:
+    """Writes scripts/baselines/<name>.json."""
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+def check_runtime(label: str, seconds: float, baseline_seconds: float,
+                  tolerance: float, min_delta: float = 0.02) -> List[str]:
+    """
+    Compares a runtime against its baseline.
+
+    A regression needs to exceed both the relative tolerance and an absolute
+    minimum delta, so that millisecond-level noise on small inputs does not fail the run.
+
+    Returns:
+        list: Failure messages (empty if within budget)
+    """
+    limit = baseline_seconds * (1 + tolerance)
+    if seconds > limit and seconds - baseline_seconds > min_delta:
+        return [f"{label}: {seconds:.4f}s > {limit:.4f}s (baseline {baseline_seconds:.4f}s +{tolerance:.0%})"]
+    return []
@@ -0,0 +1,288 @@
+# load_test.py
+"""
+Load test of the API with a configurable traffic mix and latency percentiles per endpoint.
+
+By default the FastAPI app is driven in-process (httpx + ASGITransport) against a
+seeded SQLite database in a temporary directory. With --url the same traffic is sent
+to a running server instead, e.g. a local uvicorn started on the seeded file:
+
+    python scripts/load_test.py --seed-only --db /tmp/load_test.db
+    cd src && DATABASE_URL=sqlite:////tmp/load_test.db API_KEY=secret uvicorn main:app --port 8000
+    python scripts/load_test.py --url http://127.0.0.1:8000 --api-key secret
+
+Traffic classes (weights with --mix):
+    crud    GET /employees/{id}, POST /jobs/, PUT /jobs/{id}
+    list    GET /employees/?page=N, GET /departments/
+    report  GET /hired-employees-by-quarter/, GET /departments-above-average/
+    load    POST /load-data/ with a small CSV of new hires (in-process only)
+
+Prints requests/s and p50/p95/p99 per endpoint and writes the results as JSON
+(with the git commit) so runs can be compared with --compare.
+
+Usage:
+    python scripts/load_test.py --duration 30 --concurrency 16 --mix crud=70,list=20,report=5,load=5
+    python scripts/load_test.py --compare /tmp/load_test/abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from benchmark_utils import ROOT_DIR, setup_paths, use_sqlite
+
+DEFAULT_MIX = "crud=70,list=20,report=5,load=5"
+API_KEY = "load-test"
+LOAD_ROWS = 200
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in TRAFFIC:
+            raise SystemExit(f"Unknown traffic class: {name} (use {', '.join(TRAFFIC)})")
+        mix[name] = float(weight)
+    return mix
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(q / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+class LoadTest:
+    """Shared state of a run: client, id counters and the samples per endpoint."""
+
+    def __init__(self, client, api_key: str, rows: int, data_folder: Path = None, seed: int = 42):
+        self.client = client
+        self.api_key = api_key
+        self.rows = rows
+        self.data_folder = data_folder
+        self.rng = random.Random(seed)
+        self.next_hire_id = rows + 1
+        self.load_lock = asyncio.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> None:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers={"X-API-KEY": self.api_key}, **kwargs)
+            status = str(response.status_code)
+        except Exception as e:  # errores de red con --url
+            status = type(e).__name__
+        self.samples[label].append(time.perf_counter() - start)
+        self.statuses[label][status] += 1
+
+    async def crud(self) -> None:
+        choice = self.rng.random()
+        if choice < 0.7:
+            await self.request("GET /employees/{id}", "GET", f"/employees/{self.rng.randint(1, self.rows)}")
+        elif choice < 0.85:
+            await self.request("POST /jobs/", "POST", "/jobs/", json={"job": f"Job {self.rng.random():.6f}"})
+        else:
+            await self.request("PUT /jobs/{id}", "PUT", f"/jobs/{self.rng.randint(1, 100)}", json={"job": "Updated job"})
+
+    async def list(self) -> None:
+        if self.rng.random() < 0.8:
+            pages = max(1, self.rows // 50)
+            await self.request("GET /employees/", "GET", f"/employees/?page={self.rng.randint(1, pages)}&limit=50")
+        else:
+            await self.request("GET /departments/", "GET", "/departments/")
+
+    async def report(self) -> None:
+        if self.rng.random() < 0.5:
+            await self.request("GET /hired-employees-by-quarter/", "GET", "/hired-employees-by-quarter/")
+        else:
+            await self.request("GET /departments-above-average/", "GET", "/departments-above-average/")
+
+    async def load(self) -> None:
+        if self.data_folder is None:
+            return
+        # Un archivo nuevo por carga (ids nuevos); las cargas del cliente van de a una
+        async with self.load_lock:
+            first_id = self.next_hire_id
+            self.next_hire_id += LOAD_ROWS
+            with open(self.data_folder / "hired_employees.csv", "w", encoding="utf-8") as f:
+                for hire_id in range(first_id, first_id + LOAD_ROWS):
+                    f.write(f"{hire_id},Load Test {hire_id},2021-06-01T10:00:00Z,{self.rng.randint(1, 12)},{self.rng.randint(1, 183)}\n")
+            await self.request("POST /load-data/", "POST", "/load-data/", timeout=None)
+
+TRAFFIC = {"crud": LoadTest.crud, "list": LoadTest.list, "report": LoadTest.report, "load": LoadTest.load}
+
+async def worker(test: LoadTest, mix: dict, deadline: float) -> None:
+    classes, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        await TRAFFIC[test.rng.choices(classes, weights)[0]](test)
+
+async def run(client, args, mix: dict, data_folder: Path = None) -> tuple:
+    test = LoadTest(client, args.api_key, args.rows, data_folder, args.seed)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(worker(test, mix, deadline) for _ in range(args.concurrency)))
+    return test, time.perf_counter() - start
+
+def summarize(test: LoadTest, seconds: float) -> dict:
+    endpoints = {}
+    for label, samples in sorted(test.samples.items()):
+        ordered = sorted(samples)
+        endpoints[label] = {
+            "requests": len(ordered),
+            "rps": round(len(ordered) / seconds, 2),
+            "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+            "statuses": dict(test.statuses[label]),
+        }
+    everything = sorted(sample for samples in test.samples.values() for sample in samples)
+    total = {
+        "requests": len(everything),
+        "rps": round(len(everything) / seconds, 2),
+        "p50_ms": round(percentile(everything, 50) * 1000, 2),
+        "p95_ms": round(percentile(everything, 95) * 1000, 2),
+        "p99_ms": round(percentile(everything, 99) * 1000, 2),
+    }
+    return {"total": total, "endpoints": endpoints}
+
+def print_results(results: dict) -> None:
+    print(f"{'endpoint':<34} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for label, stats in rows:
+        statuses = ", ".join(f"{code}: {count}" for code, count in sorted(stats.get("statuses", {}).items()))
+        print(f"{label:<34} {stats['requests']:>8} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}  {statuses}")
+
+def print_comparison(results: dict, previous: dict) -> None:
+    print(f"\nCompared with {previous.get('commit', '?')} ({previous.get('timestamp', '?')}):")
+    rows = list(results["endpoints"].items()) + [("TOTAL", results["total"])]
+    for label, stats in rows:
+        before = previous["total"] if label == "TOTAL" else previous.get("endpoints", {}).get(label)
+        if not before:
+            continue
+        rps_delta = (stats["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        p95_delta = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        print(f"  {label:<34} req/s {rps_delta:+7.1%}   p95 {p95_delta:+7.1%}")
+
+def seed(db_path: Path, rows: int) -> None:
+    """Creates and seeds the SQLite file (same synthetic data as the report benchmark)."""
+    from sqlalchemy import create_engine
+    from benchmark_reports import seed_database
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    seed_database(engine, rows)
+    engine.dispose()
+
+def quiet_logging(log_dir: Path) -> None:
+    """Keeps the app logs in a file only (the console handler would dominate the measurement)."""
+    import logger as app_logging
+
+    app_logging.stop_logging()
+    handler = RotatingFileHandler(log_dir / "api.log", maxBytes=50 * 1024 * 1024, backupCount=1, encoding="utf-8")
+    handler.setFormatter(app_logging.JsonFormatter())
+    app_logging.start_logging(handlers=[handler])
+
+async def run_in_process(args, mix: dict, workdir: Path) -> tuple:
+    import httpx
+
+    data_folder = workdir / "data"
+    data_folder.mkdir(exist_ok=True)
+    os.environ["DATA_FOLDER"] = str(data_folder)
+    os.environ["API_KEY"] = args.api_key
+    os.chdir(workdir)  # backups/ y logs/ de la app quedan en el directorio temporal
+
+    from database import init_db
+    init_db()
+    quiet_logging(workdir)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60) as client:
+        return await run(client, args, mix, data_folder)
+
+async def run_against_url(args, mix: dict) -> tuple:
+    import httpx
+
+    if "load" in mix:
+        print("load traffic is only generated in-process, skipping it")
+        mix = {name: weight for name, weight in mix.items() if name != "load"}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        return await run(client, args, mix)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (default: drive the app in-process)")
+    parser.add_argument("--api-key", default=API_KEY, help="X-API-KEY of the requests (and of the in-process app)")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of traffic")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights per traffic class")
+    parser.add_argument("--rows", type=int, default=100_000, help="Hires seeded in the SQLite database")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the traffic")
+    parser.add_argument("--db", type=Path, help="SQLite file to seed (default: a temporary file)")
+    parser.add_argument("--seed-only", action="store_true", help="Seed --db and exit (to start uvicorn on it)")
+    parser.add_argument("--output", type=Path, help="Results JSON (default: <tmp>/load_test/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Previous results JSON to compare with")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    workdir = Path(tempfile.mkdtemp(prefix="load_test_"))
+    db_path = (args.db or workdir / "load_test.db").resolve()
+    os.environ["LOG_DIR"] = str(workdir / "logs")
+    use_sqlite(db_path)
+    setup_paths()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.url is None or args.seed_only:
+        print(f"Seeding {args.rows:,} hires in {db_path}...")
+        seed(db_path, args.rows)
+    if args.seed_only:
+        return 0
+
+    if args.url:
+        test, seconds = asyncio.run(run_against_url(args, mix))
+    else:
+        test, seconds = asyncio.run(run_in_process(args, mix, workdir))
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": args.url or "in-process",
+        "config": {"duration": args.duration, "concurrency": args.concurrency, "mix": mix, "rows": args.rows, "seed": args.seed},
+        "seconds": round(seconds, 3),
+        **summarize(test, seconds),
+    }
+    print_results(results)
+
+    output = args.output or Path(tempfile.gettempdir()) / "load_test" / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
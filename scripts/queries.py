@@ -1,52 +1,75 @@
+from contextlib import contextmanager
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import func, case, cast
 from sqlalchemy.types import TIMESTAMP
-from database import engine, Session
+from database import heavy_engine, Session
 from models import HiredEmployee, Department, Job
 from fastapi import HTTPException
 
-SessionLocal = sessionmaker(bind=engine)
+# Los reportes usan el pool de trabajo pesado
+SessionLocal = sessionmaker(bind=heavy_engine)
 
-def hired_employees_by_quarter():
+@contextmanager
+def report_session(session=None):
+    """The caller's session (the endpoint's, so a report uses one connection), or a new one closed at the end."""
+    if session is not None:
+        yield session
+        return
     session = SessionLocal()
     try:
+        yield session
+    finally:
+        session.close()
+
+def hire_timestamp(session):
+    """Hire date as a timestamp expression (SQLite reads the ISO-8601 text directly)."""
+    if session.get_bind().dialect.name == "sqlite":
+        return HiredEmployee.datetime
+    return cast(HiredEmployee.datetime, TIMESTAMP)
+
+def hired_employees_by_quarter(session=None):
+    with report_session(session) as session:
+        return _hired_employees_by_quarter(session)
+
+def _hired_employees_by_quarter(session):
+    try:
+        hired_at = hire_timestamp(session)
         query = (
             session.query(
                 Department.department,
                 Job.job,
                 func.sum(
                     case(
-                        (func.extract('month', cast(HiredEmployee.datetime, TIMESTAMP)) >= 1, 1),
+                        (func.extract('month', hired_at) >= 1, 1),
                         else_=0
                     )
                 ).label("Q1"),
                 func.sum(
                     case(
-                        (func.extract('month', cast(HiredEmployee.datetime, TIMESTAMP)) >= 4, 1),
+                        (func.extract('month', hired_at) >= 4, 1),
                         else_=0
                     )
                 ).label("Q2"),
                 func.sum(
                     case(
-                        (func.extract('month', cast(HiredEmployee.datetime, TIMESTAMP)) >= 7, 1),
+                        (func.extract('month', hired_at) >= 7, 1),
                         else_=0
                     )
                 ).label("Q3"),
                 func.sum(
                     case(
-                        (func.extract('month', cast(HiredEmployee.datetime, TIMESTAMP)) >= 10, 1),
+                        (func.extract('month', hired_at) >= 10, 1),
                         else_=0
                     )
                 ).label("Q4"),
             )
             .join(Department, Department.id == HiredEmployee.department_id)
             .join(Job, Job.id == HiredEmployee.job_id)
-            .filter(func.extract('year', cast(HiredEmployee.datetime, TIMESTAMP)) == 2021)
+            .filter(func.extract('year', hired_at) == 2021)
             .group_by(Department.department, Job.job)
             .order_by(Department.department, Job.job)
             .all()
         )
-        session.close()
         
         result = [
             {
@@ -62,18 +85,21 @@ def hired_employees_by_quarter():
         
         return result
     except Exception as e:
-        session.close()
         raise HTTPException(status_code=500, detail=str(e))
 
-def departments_above_average():
-    session = SessionLocal()
+def departments_above_average(session=None):
+    with report_session(session) as session:
+        return _departments_above_average(session)
+
+def _departments_above_average(session):
     try:
+        hired_at = hire_timestamp(session)
         department_hires = (
             session.query(
                 HiredEmployee.department_id,
                 func.count(HiredEmployee.id).label("total_hires")
             )
-            .filter(func.extract('year', cast(HiredEmployee.datetime, TIMESTAMP)) == 2021) 
+            .filter(func.extract('year', hired_at) == 2021) 
             .group_by(HiredEmployee.department_id)
             .subquery()
         )
@@ -94,15 +120,13 @@ def departments_above_average():
                 func.count(HiredEmployee.id).label("hired")
             )
             .join(HiredEmployee, Department.id == HiredEmployee.department_id)
-            .filter(func.extract('year', cast(HiredEmployee.datetime, TIMESTAMP)) == 2021)
+            .filter(func.extract('year', hired_at) == 2021)
             .group_by(Department.id, Department.department)
             .having(func.count(HiredEmployee.id) > avg_hires)
             .order_by(func.count(HiredEmployee.id).desc())
             .all()
         )
 
-        session.close()
-
         # result into a list of dict
         result = [
             {
@@ -116,5 +140,4 @@ def departments_above_average():
         return result
 
     except Exception as e:
-        session.close()
         raise HTTPException(status_code=500, detail=str(e))
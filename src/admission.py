@@ -0,0 +1,183 @@
+# admission.py
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+
+from fastapi import HTTPException
+
+from core import ADMISSION_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_TIMEOUT
+from logger import setup_logger
+from models import DATA_TABLES
+
+logger = setup_logger("app.admission")
+
+# Clases de endpoints pesados: cargas de datos, backups/restores y reportes
+ENDPOINT_CLASSES = ["load", "backup", "report"]
+
+# Conexiones del pool pesado que usa a la vez un trabajo admitido de cada clase: una carga
+# y un reporte usan una; /backup-all/ respalda todas las tablas a la vez (una por tabla)
+CONNECTIONS_PER_JOB = {"load": 1, "backup": len(DATA_TABLES), "report": 1}
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded wait queue for one class of endpoints.
+
+    Requests wait on the event loop (not on a threadpool thread) until a slot is free.
+    When the queue is full, or a request waits longer than `timeout`, it is rejected
+    with 429 and a Retry-After estimated from the recent service time.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._semaphore = None
+        self._loop = None
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_service = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Un semáforo por event loop (TestClient y uvicorn --reload crean loops nuevos)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+            self.active = 0
+            self.waiting = 0
+        return self._semaphore
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free (average service time x queue position)."""
+        service = self.total_service / self.completed if self.completed else 1.0
+        return max(1, math.ceil(service * (self.waiting + 1) / self.concurrency))
+
+    def _reject(self, reason: str) -> None:
+        self.rejected += 1
+        retry_after = self.retry_after()
+        logger.warning("Rejected %s request: %s (retry after %ss)", self.name, reason, retry_after)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many concurrent {self.name} requests, try again later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    async def acquire(self) -> float:
+        """Waits for a slot and returns the time service started (raises 429 if rejected)."""
+        semaphore = self._get_semaphore()
+        if self.active + self.waiting >= self.concurrency + self.queue_size:
+            self._reject("queue full")
+
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._reject(f"waited more than {self.timeout}s")
+        finally:
+            self.waiting -= 1
+
+        started = time.monotonic()
+        waited = started - start
+        self.active += 1
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 0.1:
+            logger.info("Admitted %s request after waiting %.2fs", self.name, waited)
+        return started
+
+    def release(self, started: float) -> None:
+        self.active -= 1
+        self.completed += 1
+        self.total_service += time.monotonic() - started
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queued": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait_seconds": round(self.max_wait, 4),
+            "avg_service_seconds": round(self.total_service / self.completed, 4) if self.completed else 0.0,
+        }
+
+
+def _parse_limits(value: str) -> Dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, number = item.partition("=")
+        limits[name.strip()] = int(number)
+    return limits
+
+
+def _build_gates() -> Dict[str, AdmissionGate]:
+    concurrency = _parse_limits(ADMISSION_CONCURRENCY)
+    queue_sizes = _parse_limits(ADMISSION_QUEUE_SIZE)
+    return {
+        name: AdmissionGate(name, max(1, concurrency.get(name, 1)), max(0, queue_sizes.get(name, 0)), ADMISSION_TIMEOUT)
+        for name in ENDPOINT_CLASSES
+    }
+
+
+GATES = _build_gates()
+
+
+def heavy_pool_size() -> int:
+    """Connections the heavy pool needs so that every admitted job gets its connections without waiting."""
+    return sum(gate.concurrency * CONNECTIONS_PER_JOB[name] for name, gate in GATES.items())
+
+
+@asynccontextmanager
+async def admitted(endpoint_class: str):
+    """
+    Holds a slot of `endpoint_class` inside an endpoint, for requests that only sometimes
+    do heavy work (e.g. a report that may be answered with 304 Not Modified).
+
+    Args:
+        endpoint_class: One of ENDPOINT_CLASSES
+    """
+    gate = GATES[endpoint_class]
+    started = await gate.acquire()
+    try:
+        yield
+    finally:
+        gate.release(started)
+
+
+def admit(endpoint_class: str):
+    """
+    Builds a dependency that holds a slot of `endpoint_class` while the request runs.
+
+    Args:
+        endpoint_class: One of ENDPOINT_CLASSES
+
+    Returns:
+        Async generator dependency for Depends()
+    """
+    async def admission_dependency():
+        async with admitted(endpoint_class):
+            yield
+
+    return admission_dependency
+
+
+def get_admission_stats() -> dict:
+    """Queue depth, active requests and wait times of every endpoint class."""
+    return {name: gate.stats() for name, gate in GATES.items()}
@@ -0,0 +1,220 @@
+# arrow_loader.py
+import io
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+from models import TABLE_COLUMNS
+from versioning import bump_table_version
+from changes import record_change, BULK_INSERT
+from search import index_employees
+from logger import setup_logger
+
+logger = setup_logger("app.loader")
+reject_logger = setup_logger("app.loader.rejects")
+
+# Bytes leídos por record batch
+BLOCK_SIZE = 8 * 1024 * 1024
+
+# Esquema destino de cada tabla; el CSV se lee como texto y se convierte tras validar
+ARROW_SCHEMAS = {
+    "hired_employees": pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("datetime", pa.string()),
+        ("department_id", pa.int64()),
+        ("job_id", pa.int64()),
+    ]),
+    "departments": pa.schema([("id", pa.int64()), ("department", pa.string())]),
+    "jobs": pa.schema([("id", pa.int64()), ("job", pa.string())]),
+}
+
+# Entero, admitiendo la forma "3.0" que producen las exportaciones con floats
+INTEGER_PATTERN = r"^\s*[0-9]+(\.0*)?\s*$"
+
+# Mayor entero representable; los textos más grandes se rechazan en la validación
+INT64_MAX = str(2 ** 63 - 1)
+
+
+def _not_blank(column: pa.Array) -> pa.Array:
+    return pc.fill_null(pc.greater(pc.utf8_length(pc.utf8_trim_whitespace(column)), 0), False)
+
+
+def _is_integer(column: pa.Array) -> pa.Array:
+    """Textos enteros que caben en int64 (sin esto el cast de un solo valor enorme abortaría el archivo)."""
+    matches = pc.match_substring_regex(column, INTEGER_PATTERN)
+    digits = pc.replace_substring_regex(pc.utf8_trim_whitespace(column), r"^0+|\.0*$", "")
+    length = pc.utf8_length(digits)
+    fits = pc.or_(pc.less(length, len(INT64_MAX)),
+                  pc.and_(pc.equal(length, len(INT64_MAX)), pc.less_equal(digits, INT64_MAX)))
+    return pc.fill_null(pc.and_(matches, fits), False)
+
+
+def _to_int(column: pa.Array, valid: pa.Array) -> pa.Array:
+    """Convierte a int64 los textos enteros válidos (el resto queda en null)."""
+    numbers = pc.if_else(valid, pc.utf8_trim_whitespace(column), pa.scalar(None, pa.string()))
+    return pc.cast(pc.replace_substring_regex(numbers, r"\.0*$", ""), pa.int64())
+
+
+def _is_positive_id(column: pa.Array) -> pa.Array:
+    valid = _is_integer(column)
+    return pc.and_(valid, pc.fill_null(pc.greater(_to_int(column, valid), 0), False))
+
+
+def _checks(batch: pa.RecordBatch, table_name: str) -> list:
+    """
+    Las reglas de validators.validate_record expresadas como compute kernels.
+
+    Returns:
+        list: [(mensaje de error, array booleano con True donde la fila cumple)]
+    """
+    column = batch.column
+    checks = [("El campo 'id' es inválido o está vacío", _is_integer(column("id")))]
+
+    if table_name == "hired_employees":
+        checks += [
+            ("El campo 'name' es requerido y debe ser un string válido", _not_blank(column("name"))),
+            ("El campo 'datetime' es requerido", _not_blank(column("datetime"))),
+            ("department_id inválido", _is_positive_id(column("department_id"))),
+            ("job_id inválido", _is_positive_id(column("job_id"))),
+        ]
+    elif table_name == "departments":
+        checks.append(("El campo 'department' es requerido y debe ser un string válido", _not_blank(column("department"))))
+    elif table_name == "jobs":
+        checks.append(("El campo 'job' es requerido y debe ser un string válido", _not_blank(column("job"))))
+
+    return checks
+
+
+def _source_line(row: int, malformed_lines: list) -> int:
+    """Línea del archivo de la fila (base 0), contando las líneas que descartó el lector."""
+    line = row + 1
+    for skipped in malformed_lines:
+        if skipped > line:
+            break
+        line += 1
+    return line
+
+
+def _validate_batch(batch: pa.RecordBatch, table_name: str, first_row: int, malformed_lines: list):
+    """
+    Valida un batch de columnas de texto y lo convierte al esquema de la tabla.
+
+    Solo las filas rechazadas (normalmente pocas) se convierten a valores Python, para registrarlas.
+
+    Returns:
+        tuple: (RecordBatch con las filas válidas, cantidad de rechazados)
+    """
+    schema = ARROW_SCHEMAS[table_name]
+    present = pc.is_valid(batch.column(0))
+    for values in batch.columns[1:]:
+        present = pc.or_(present, pc.is_valid(values))
+    checks = _checks(batch, table_name)
+
+    valid = checks[0][1]
+    for _, passed in checks[1:]:
+        valid = pc.and_(valid, passed)
+    rejected = pc.and_(pc.invert(valid), present)  # las líneas vacías no cuentan
+
+    rejected_count = pc.sum(rejected).as_py() or 0
+    if rejected_count:
+        for row in pc.indices_nonzero(rejected).to_pylist():
+            errors = [message for message, passed in checks if not passed[row].as_py()]
+            reject_logger.warning("Registro inválido en CSV (%s, línea %s): %s",
+                                  table_name, _source_line(first_row + row, malformed_lines), errors)
+
+    valid_batch = batch.filter(valid)
+    columns = []
+    for field in schema:
+        values = valid_batch.column(field.name)
+        if pa.types.is_integer(field.type):
+            values = _to_int(values, pc.is_valid(values))
+        columns.append(values)
+    return pa.RecordBatch.from_arrays(columns, schema=schema), rejected_count
+
+
+def _write_batch(engine, table_name: str, batch: pa.RecordBatch) -> None:
+    """
+    Escribe un batch validado en una transacción, junto con la versión de la tabla.
+
+    En PostgreSQL el batch entra por COPY (Arrow genera el buffer CSV en C++).
+    El driver de SQLite no tiene carga masiva, así que las columnas van a executemany.
+    """
+    columns = ", ".join(batch.schema.names)
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            buffer = io.BytesIO()
+            pv.write_csv(batch, buffer, pv.WriteOptions(include_header=False))
+            buffer.seek(0)
+            cursor = conn.connection.cursor()
+            cursor.copy_expert(f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            placeholders = ", ".join("?" * batch.num_columns)
+            rows = zip(*(column.to_pylist() for column in batch.columns))
+            conn.exec_driver_sql(f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", list(rows))
+        bump_table_version(conn, table_name)
+        ids = batch.column("id").to_pylist()
+        record_change(conn, table_name, BULK_INSERT, data={"ids": ids})
+        if table_name == "hired_employees":
+            index_employees(conn, ids, batch.column("name").to_pylist())
+
+
+def load_csv_arrow(csv_file, table_name, db, block_size=BLOCK_SIZE):
+    """
+    Carga un CSV sin cabecera con pyarrow: record batches, validación con compute kernels
+    y escritura columnar (COPY en PostgreSQL).
+
+    Las filas con un número de columnas distinto al esperado se rechazan con su línea;
+    las líneas vacías se ignoran.
+
+    Args:
+        csv_file: Ruta del archivo
+        table_name: Tabla destino (hired_employees, departments o jobs)
+        db: Sesión de base de datos (se usa su engine)
+        block_size: Bytes leídos por record batch
+    """
+    try:
+        engine = db.bind
+        if table_name not in ARROW_SCHEMAS:
+            raise ValueError(f"Tabla {table_name} no reconocida.")
+        column_names = TABLE_COLUMNS[table_name]
+        start_time = time.perf_counter()
+        malformed_lines = []
+
+        def skip_malformed(row):
+            malformed_lines.append(row.number)
+            reject_logger.warning("Registro inválido en CSV (%s, línea %s): %s columnas en lugar de %s",
+                                  table_name, row.number, row.actual_columns, row.expected_columns)
+            return "skip"
+
+        reader = pv.open_csv(
+            csv_file,
+            read_options=pv.ReadOptions(column_names=column_names, block_size=block_size, use_threads=False),
+            parse_options=pv.ParseOptions(ignore_empty_lines=False, invalid_row_handler=skip_malformed),
+            convert_options=pv.ConvertOptions(column_types={name: pa.string() for name in column_names},
+                                              strings_can_be_null=True, quoted_strings_can_be_null=False)
+        )
+
+        valid_rows = 0
+        rejected_rows = 0
+        rows_read = 0
+        for batch in reader:
+            valid_batch, rejected = _validate_batch(batch, table_name, rows_read, malformed_lines)
+            rows_read += batch.num_rows
+            rejected_rows += rejected
+            if valid_batch.num_rows:
+                _write_batch(engine, table_name, valid_batch)
+                valid_rows += valid_batch.num_rows
+                logger.info("%s registros válidos insertados en %s.", valid_batch.num_rows, table_name)
+
+        rejected_rows += len(malformed_lines)
+        seconds = time.perf_counter() - start_time
+        logger.info("Carga Arrow de %s: %s registros válidos, %s rechazados en %.2fs (%.0f filas/s)",
+                    table_name, valid_rows, rejected_rows, seconds, (valid_rows + rejected_rows) / max(seconds, 1e-9))
+        return {"message": f"{valid_rows} registros insertados exitosamente.", "rejected": rejected_rows}
+
+    except Exception as e:
+        logger.error("Error cargando %s desde %s: %s", table_name, csv_file, e)
+        return {"error": str(e)}
@@ -1,67 +1,215 @@
 import os
+import json
+import math
+import time
+import shutil
+import io
+import hashlib
+import multiprocessing
 import fastavro
 import pandas as pd
-from sqlalchemy import text
-from database import engine
+from fastavro.write import Writer
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from sqlalchemy import MetaData, Table, func, inspect, or_, select, text
+from sqlalchemy.types import Boolean, Date, DateTime, Float, Integer, LargeBinary, Numeric, String
+from database import heavy_engine as engine  # pool separado del de la API CRUD
+from models import Base, DATA_TABLES
+from logger import setup_logger, init_worker_logging, worker_log_queue
+from versioning import bump_table_version
+from changes import record_change, last_seq, changed_ids, RESTORE, RESTORE_RANGE
+from search import rebuild_search_index, reindex_id_range
 
-# Directorio de backups
+logger = setup_logger("app.backup")
+
+# Directorio de backups (se crea al escribir el primer backup)
 BACKUP_DIR = "backups"
-os.makedirs(BACKUP_DIR, exist_ok=True)
+
+# Filas leídas del cursor por lote (y filas por bloque AVRO)
+BATCH_SIZE = 10000
+
+# Los bloques se escriben a mano, uno por lote, para poder indexarlos
+AVRO_NO_AUTOFLUSH = 1 << 62
+
+def _reflect_table(table_name):
+    """Reflects a table from the database (None if it does not exist)."""
+    if not inspect(engine).has_table(table_name):
+        return None
+    return Table(table_name, MetaData(), autoload_with=engine)
+
+def _avro_type(column_type):
+    """Maps a SQLAlchemy column type (SQLite or PostgreSQL) to an AVRO type."""
+    if isinstance(column_type, Boolean):
+        return "boolean"
+    if isinstance(column_type, Integer):
+        return "long"
+    if isinstance(column_type, (Float, Numeric)):
+        return "double"
+    if isinstance(column_type, DateTime):
+        return {"type": "long", "logicalType": "timestamp-micros"}
+    if isinstance(column_type, Date):
+        return {"type": "int", "logicalType": "date"}
+    if isinstance(column_type, LargeBinary):
+        return "bytes"
+    return "string"
+
+def _value_converter(avro_type):
+    """Returns the function that adapts a DB value to its AVRO type (None if no conversion is needed)."""
+    if avro_type == "double":
+        return float  # Decimal de Numeric
+    if avro_type == "string":
+        return str  # Time, Interval, JSON, UUID...
+    return None
+
+def _schema_from_table(table):
+    fields = []
+    for column in table.columns:
+        avro_type = _avro_type(column.type)
+        if column.nullable and not column.primary_key:
+            fields.append({"name": column.name, "type": ["null", avro_type], "default": None})
+        else:
+            fields.append({"name": column.name, "type": avro_type})
+    return {"type": "record", "name": table.name, "fields": fields}
 
 def get_table_schema(table_name):
-    """Retrieves the structure of a table from the database."""
-    with engine.connect() as conn:
-        result = conn.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
-    
-    if not result:
+    """Builds a typed AVRO schema (nullable columns as ["null", type] unions) from the table's column types."""
+    table = _reflect_table(table_name)
+    if table is None:
         return None
+    return _schema_from_table(table)
 
-    schema = []
-    for row in result:
-        column_name = row[1]
-        column_type = "int" if "int" in row[2] else "string"
-        schema.append({"name": column_name, "type": column_type})
+def _stream_batches(table, batch_size, where=None):
+    """Reads the table with a server-side cursor and yields lists of AVRO-ready records."""
+    converters = [(column.name, _value_converter(_avro_type(column.type))) for column in table.columns]
+    order_by = list(table.primary_key.columns) or [list(table.columns)[0]]
 
-    return schema
+    query = select(table).order_by(*order_by)
+    if where is not None:
+        query = query.where(where)
 
-def backup_table(table_name):
-    """Generates a backup of a table in AVRO format with the correct types (converting ID to string)."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(query)
+        for partition in result.partitions(batch_size):
+            batch = []
+            for row in partition:
+                record = {}
+                for (name, convert), value in zip(converters, row):
+                    record[name] = convert(value) if convert is not None and value is not None else value
+                batch.append(record)
+            yield batch
+
+def _remove_quietly(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _write_json(file_path, data):
+    tmp_path = f"{file_path}.tmp"
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(f"SELECT * FROM {table_name}")).fetchall()
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
 
-        if not result:
-            return {"error": f"La tabla {table_name} está vacía o no existe."}
+def _index_path(file_path):
+    return f"{file_path}.idx.json"
 
-        records = [dict(row._mapping) for row in result]
+def _write_avro_file(file_path, table, batch_size, codec, where=None):
+    """
+    Streams the rows of the table (optionally filtered) into an AVRO file and returns the row count.
 
-        for record in records:
-            for key, value in record.items():
-                if value is None:
-                    record[key] = ""
-                elif isinstance(value, int):  # Convert int to string
-                    record[key] = str(value)
-                else:
-                    record[key] = str(value)  # Ensure everything is a string
+    Each batch is flushed as its own AVRO block. Rows come ordered by primary key, so a side
+    index (<file>.idx.json) can map the id range of every block to its byte offset.
+    """
+    schema = fastavro.parse_schema(_schema_from_table(table))
+    key = "id" if "id" in table.c else None
+    rows = 0
+    blocks = []
 
-        # Define AVRO schema ensuring all fields are strings
-        schema = {
-            "type": "record",
-            "name": table_name,
-            "fields": [{"name": key, "type": "string"} for key in records[0].keys()]
-        }
+    # Se escribe en un archivo temporal para no pisar el backup anterior si algo falla
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as out_file:
+            writer = Writer(out_file, schema, codec=codec, sync_interval=AVRO_NO_AUTOFLUSH)
+            header_size = out_file.tell()
+            for batch in _stream_batches(table, batch_size, where):
+                offset = out_file.tell()
+                for record in batch:
+                    writer.write(record)
+                writer.flush()
+                blocks.append({
+                    "offset": offset,
+                    "size": out_file.tell() - offset,
+                    "rows": len(batch),
+                    "min_id": batch[0][key] if key else None,
+                    "max_id": batch[-1][key] if key else None
+                })
+                rows += len(batch)
+            file_size = out_file.tell()
+
+        index = {"key": key, "header_size": header_size, "file_size": file_size, "blocks": blocks}
+        _write_json(_index_path(tmp_path), index)
+        os.replace(tmp_path, file_path)
+        os.replace(_index_path(tmp_path), _index_path(file_path))
+    except BaseException:
+        # Un backup fallido no deja archivos .tmp a medio escribir
+        _remove_quietly(tmp_path, _index_path(tmp_path))
+        raise
+    return rows
+
+def backup_table(table_name, batch_size=BATCH_SIZE, codec="null"):
+    """
+    Generates a backup of a table in AVRO format, streaming it in batches.
+
+    Rows are read with a server-side cursor and written to the AVRO file block by block,
+    so memory does not grow with the size of the table. Column types are preserved and
+    NULL values are kept as null.
+
+    Args:
+        table_name: Table to back up
+        batch_size: Rows fetched from the cursor per batch
+        codec: AVRO block codec ("null", "deflate", ...)
+
+    Returns:
+        dict: Message and number of rows, or error
+    """
+    try:
+        table = _reflect_table(table_name)
+        if table is None:
+            return {"error": f"La tabla {table_name} no existe."}
 
         file_path = os.path.join(BACKUP_DIR, f"{table_name}.avro")
-        with open(file_path, "wb") as out_file:
-            fastavro.writer(out_file, schema, records)
+        rows = _write_avro_file(file_path, table, batch_size, codec)
 
-        return {"message": f"Backup of {table_name} saved in {file_path}"}
+        return {"message": f"Backup of {table_name} saved in {file_path}", "rows": rows}
 
     except Exception as e:
         return {"error": str(e)}
 
-def restore_table(table_name):
-    """Restores table data from an AVRO file, converting ID from string to int if necessary."""
+def restore_table(table_name, mode="replace", batch_size=BATCH_SIZE, upto=None):
+    """
+    Restores table data from an AVRO file.
+
+    Modes:
+        replace: Loads the whole file with pandas and replaces the table (legacy, loses the DDL).
+        staged: Streams the file into a staging table built from models.py and swaps it in atomically.
+        partitioned: Like staged, but loads the parts of a partitioned backup in parallel.
+        chain: Like staged, but replays an incremental chain (base + deltas) up to entry `upto`.
+    """
+    if mode == "staged":
+        return restore_table_staged(table_name, batch_size)
+    if mode == "partitioned":
+        return restore_table_partitioned(table_name, batch_size=batch_size)
+    if mode == "chain":
+        return restore_table_chain(table_name, upto, batch_size)
+    if mode != "replace":
+        return {"error": f"Modo de restore desconocido: {mode}"}
+
     try:
         file_path = os.path.join(BACKUP_DIR, f"{table_name}.avro")
         
@@ -75,15 +223,667 @@ def restore_table(table_name):
         if not records:
             return {"error": f"The backup of {table_name} is empty."}
 
-        # Convert id from string to int if necessary
+        # Convert id from string to int if necessary (backups anteriores, todo en string)
         for record in records:
-            if "id" in record and record["id"].isdigit():
+            if "id" in record and isinstance(record["id"], str) and record["id"].isdigit():
                 record["id"] = int(record["id"])  # Convert to int before inserting into the DB
 
         df = pd.DataFrame(records)
-        df.to_sql(table_name, con=engine, if_exists="replace", index=False)
+        with engine.begin() as conn:
+            df.to_sql(table_name, con=conn, if_exists="replace", index=False)
+            bump_table_version(conn, table_name)
+            record_change(conn, table_name, RESTORE, data={"rows": len(df)})
+            if table_name == "hired_employees":
+                rebuild_search_index(conn)
 
         return {"message": f"Data restored in {table_name} from {file_path}"}
 
     except Exception as e:
         return {"error": str(e)}
+
+def _coerce_value(value, column):
+    """Converts a value read from AVRO back to the type of the model column."""
+    if value is None:
+        return None
+    if isinstance(column.type, Integer):
+        if isinstance(value, str):  # backups anteriores, todo en string
+            value = value.strip()
+            return int(float(value)) if value else None
+        return int(value)
+    if isinstance(column.type, String) and not isinstance(value, str):
+        return str(value)
+    return value
+
+def _read_batches(reader, table, batch_size):
+    """Groups AVRO records in batches, keeping only the model columns with their types."""
+    columns = list(table.columns)
+    batch = []
+    for record in reader:
+        batch.append({column.name: _coerce_value(record.get(column.name), column) for column in columns})
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _create_staging_table(table):
+    """Creates <table>_staging with the same DDL as the model (PK, autoincrement, types)."""
+    staging = table.to_metadata(MetaData(), name=f"{table.name}_staging")
+    with engine.begin() as conn:
+        staging.drop(conn, checkfirst=True)
+        staging.create(conn)
+    return staging
+
+def _load_avro_file(file_path, staging, batch_size, label, upsert=False):
+    """
+    Inserts an AVRO file into the staging table batch by batch, logging the throughput of each batch.
+
+    upsert=True replaces rows already loaded from a previous file (deltas of an incremental chain).
+    """
+    rows = 0
+    batches = []
+    with open(file_path, "rb") as in_file, engine.connect() as conn:
+        for number, batch in enumerate(_read_batches(fastavro.reader(in_file), staging, batch_size), 1):
+            start = time.perf_counter()
+            with conn.begin():
+                if upsert:
+                    _upsert_rows(conn, staging, batch)
+                else:
+                    conn.execute(staging.insert(), batch)
+            seconds = time.perf_counter() - start
+            rows_per_sec = int(len(batch) / seconds) if seconds > 0 else None
+            logger.info("Restore %s: lote %s, %s filas, %s filas/s", label, number, len(batch), rows_per_sec)
+            batches.append({"batch": number, "rows": len(batch), "seconds": round(seconds, 4), "rows_per_sec": rows_per_sec})
+            rows += len(batch)
+    return rows, batches
+
+def _rename_postgres_objects(conn, table, staging_name):
+    """PostgreSQL keeps the staging names on the PK index and serial sequence; rename them back."""
+    indexes = conn.execute(text("SELECT indexname FROM pg_indexes WHERE tablename = :t"), {"t": table.name}).scalars().all()
+    for index_name in indexes:
+        if staging_name in index_name:
+            conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name.replace(staging_name, table.name)}"'))
+
+    for column in table.primary_key.columns:
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence(:t, :c)"), {"t": table.name, "c": column.name}).scalar()
+        if sequence:
+            new_sequence = f"{table.name}_{column.name}_seq"
+            conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {new_sequence}"))
+            conn.execute(text(f"SELECT setval('{new_sequence}', COALESCE(MAX({column.name}), 0) + 1, false) FROM {table.name}"))
+
+def _swap_staging_table(table, staging):
+    """Replaces the table with its staging copy in a single transaction."""
+    old_name = f"{table.name}_old"
+    with engine.begin() as conn:
+        # Primero un DML: pysqlite solo abre la transacción antes de un INSERT/UPDATE/DELETE,
+        # así los RENAME de SQLite también quedan dentro de ella
+        bump_table_version(conn, table.name)
+        record_change(conn, table.name, RESTORE)
+        conn.execute(text(f"DROP TABLE IF EXISTS {old_name}"))
+        if inspect(conn).has_table(table.name):
+            conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+        conn.execute(text(f"ALTER TABLE {staging.name} RENAME TO {table.name}"))
+        conn.execute(text(f"DROP TABLE {old_name}"))
+        if conn.dialect.name == "postgresql":
+            _rename_postgres_objects(conn, table, staging.name)
+        if table.name == "hired_employees":
+            rebuild_search_index(conn)
+
+def restore_table_staged(table_name, batch_size=BATCH_SIZE):
+    """
+    Restores a table from its AVRO backup through a staging table.
+
+    Records are streamed from the file in batches, converted back to the column types of the
+    model and bulk-inserted into <table>_staging, created with the same DDL as models.py.
+    The original table stays readable until the staging table is swapped in atomically.
+
+    Args:
+        table_name: Table to restore (must be defined in models.py)
+        batch_size: Records inserted per batch
+
+    Returns:
+        dict: Message, rows, overall throughput and per-batch throughput, or error
+    """
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return {"error": f"No hay modelo para {table_name}, usar mode=replace."}
+
+    file_path = os.path.join(BACKUP_DIR, f"{table_name}.avro")
+    if not os.path.exists(file_path):
+        return {"error": f"No backup exists for {table_name}."}
+
+    staging = None
+    try:
+        start = time.perf_counter()
+        staging = _create_staging_table(table)
+        rows, batches = _load_avro_file(file_path, staging, batch_size, table_name)
+        if not rows:
+            staging.drop(engine, checkfirst=True)
+            return {"error": f"The backup of {table_name} is empty."}
+
+        _swap_staging_table(table, staging)
+        seconds = time.perf_counter() - start
+
+        return {
+            "message": f"Data restored in {table_name} from {file_path}",
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": int(rows / seconds) if seconds > 0 else None,
+            "batches": batches
+        }
+
+    except Exception as e:
+        logger.error("Error en restore por staging de %s: %s", table_name, e, exc_info=True)
+        if staging is not None:
+            staging.drop(engine, checkfirst=True)
+        return {"error": str(e)}
+
+# Backups particionados por rangos de id: backups/<tabla>/part-NNNNN.avro + manifest.json
+MANIFEST_FILE = "manifest.json"
+DEFAULT_PARTS = 8
+
+def _process_pool(jobs, workers=None):
+    """
+    Pool of worker processes started with "spawn".
+
+    Fork would copy the logging listener's locks and the engine's connections in whatever state
+    they are at that moment; spawned workers import their own engine, and their log records
+    go to this process's queue (only the parent writes logs/api.log).
+    """
+    return ProcessPoolExecutor(max_workers=workers or _default_workers(jobs), mp_context=multiprocessing.get_context("spawn"),
+                               initializer=init_worker_logging, initargs=(worker_log_queue(),))
+
+def _default_workers(jobs):
+    return max(1, min(jobs, os.cpu_count() or 1))
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _id_ranges(table, parts):
+    """Splits [min(id), max(id)] in `parts` contiguous ranges."""
+    with engine.connect() as conn:
+        low, high = conn.execute(select(func.min(table.c.id), func.max(table.c.id))).one()
+    if low is None:
+        return []
+    step = max(1, math.ceil((high - low + 1) / parts))
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+def _backup_part(table_name, part_dir, number, min_id, max_id, batch_size, codec):
+    """Worker: writes the rows with min_id <= id <= max_id to their own AVRO part."""
+    table = _reflect_table(table_name)
+    file_name = f"part-{number:05d}.avro"
+    file_path = os.path.join(part_dir, file_name)
+    where = table.c.id.between(min_id, max_id)
+    rows = _write_avro_file(file_path, table, batch_size, codec, where)
+    return {"file": file_name, "min_id": min_id, "max_id": max_id, "rows": rows, "sha256": _file_sha256(file_path)}
+
+def backup_table_partitioned(table_name, parts=DEFAULT_PARTS, workers=None, batch_size=BATCH_SIZE, codec="deflate"):
+    """
+    Backs up a table as compressed AVRO parts written in parallel, one per id range.
+
+    The parts and a manifest (rows, id bounds and SHA-256 of each part) are written to
+    backups/<table>/, replacing the previous partitioned backup only when all parts succeed.
+
+    Args:
+        table_name: Table to back up (needs an integer `id` column)
+        parts: Number of id ranges
+        workers: Worker processes (default: one per CPU, at most `parts`)
+        batch_size: Rows fetched from the cursor per batch
+        codec: AVRO block codec
+
+    Returns:
+        dict: Message, rows and parts, or error
+    """
+    try:
+        table = _reflect_table(table_name)
+        if table is None:
+            return {"error": f"La tabla {table_name} no existe."}
+        if "id" not in table.c:
+            return {"error": f"La tabla {table_name} no tiene columna id para particionar."}
+
+        part_dir = os.path.join(BACKUP_DIR, table_name)
+        tmp_dir = f"{part_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        ranges = _id_ranges(table, parts)
+        with _process_pool(len(ranges), workers) as pool:
+            futures = [
+                pool.submit(_backup_part, table_name, tmp_dir, number, min_id, max_id, batch_size, codec)
+                for number, (min_id, max_id) in enumerate(ranges)
+            ]
+            entries = [future.result() for future in futures]
+
+        manifest = {
+            "table": table_name,
+            "key": "id",
+            "codec": codec,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "rows": sum(entry["rows"] for entry in entries),
+            "parts": entries
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(part_dir, ignore_errors=True)
+        os.replace(tmp_dir, part_dir)
+
+        return {"message": f"Backup of {table_name} saved in {part_dir}", "rows": manifest["rows"], "parts": len(entries)}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+def _restore_part(table_name, file_path, sha256, rows, batch_size):
+    """Worker: checks the part checksum and loads it into <table>_staging."""
+    if _file_sha256(file_path) != sha256:
+        raise ValueError(f"Checksum inválido en {file_path}")
+    staging = Base.metadata.tables[table_name].to_metadata(MetaData(), name=f"{table_name}_staging")
+    loaded, batches = _load_avro_file(file_path, staging, batch_size, f"{table_name}/{os.path.basename(file_path)}")
+    if loaded != rows:
+        raise ValueError(f"{file_path}: se esperaban {rows} filas y se leyeron {loaded}")
+    return loaded, batches
+
+def restore_table_partitioned(table_name, workers=None, batch_size=BATCH_SIZE):
+    """
+    Restores a partitioned backup, loading its parts in parallel into a staging table.
+
+    Every part is verified against the manifest (checksum and row count) before the
+    staging table is swapped in. SQLite allows a single writer, so there parts are loaded one at a time.
+
+    Returns:
+        dict: Message, rows, parts and throughput, or error
+    """
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return {"error": f"No hay modelo para {table_name}, usar mode=replace."}
+
+    part_dir = os.path.join(BACKUP_DIR, table_name)
+    manifest_path = os.path.join(part_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {"error": f"No partitioned backup exists for {table_name}."}
+
+    staging = None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not manifest["rows"]:
+            return {"error": f"The backup of {table_name} is empty."}
+
+        if engine.dialect.name == "sqlite":
+            workers = 1
+        start = time.perf_counter()
+        staging = _create_staging_table(table)
+        with _process_pool(len(manifest["parts"]), workers) as pool:
+            futures = [
+                pool.submit(_restore_part, table_name, os.path.join(part_dir, part["file"]), part["sha256"], part["rows"], batch_size)
+                for part in manifest["parts"]
+            ]
+            results = [future.result() for future in futures]
+
+        _swap_staging_table(table, staging)
+        rows = sum(loaded for loaded, _ in results)
+        seconds = time.perf_counter() - start
+
+        return {
+            "message": f"Data restored in {table_name} from {part_dir}",
+            "rows": rows,
+            "parts": len(results),
+            "seconds": round(seconds, 3),
+            "rows_per_sec": int(rows / seconds) if seconds > 0 else None
+        }
+
+    except Exception as e:
+        logger.error("Error en restore particionado de %s: %s", table_name, e, exc_info=True)
+        if staging is not None:
+            staging.drop(engine, checkfirst=True)
+        return {"error": str(e)}
+
+def backup_all_tables(parts=1, workers=None):
+    """
+    Backs up every data table at the same time, one job per table.
+
+    Args:
+        parts: 1 for a single AVRO file per table, more for partitioned backups
+        workers: Worker processes per partitioned backup
+
+    Returns:
+        dict: Result of each table
+    """
+    with ThreadPoolExecutor(max_workers=len(DATA_TABLES)) as pool:
+        if parts > 1:
+            futures = {name: pool.submit(backup_table_partitioned, name, parts, workers) for name in DATA_TABLES}
+        else:
+            futures = {name: pool.submit(backup_table, name) for name in DATA_TABLES}
+        results = {name: future.result() for name, future in futures.items()}
+
+    failed = [name for name, result in results.items() if "error" in result]
+    if failed:
+        return {"error": f"Backup failed for: {', '.join(failed)}", "tables": results}
+    return {"message": "Backup of all tables completed", "tables": results}
+
+# Backups incrementales: backups/<tabla>.chain/ con una base, deltas y catalog.json
+CATALOG_FILE = "catalog.json"
+
+def _chain_dir(table_name):
+    return os.path.join(BACKUP_DIR, f"{table_name}.chain")
+
+def get_backup_catalog(table_name):
+    """Returns the catalog of the incremental chain of a table (None if there is none)."""
+    catalog_path = os.path.join(_chain_dir(table_name), CATALOG_FILE)
+    if not os.path.exists(catalog_path):
+        return None
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+# Rangos de id (bajo el watermark) que puede filtrar un delta; con más cambios
+# dispersos que esto se escribe una base nueva
+MAX_DELTA_RANGES = 1000
+
+def _id_runs(ids):
+    """Compacts ids into runs of consecutive ids: [(start_id, end_id)]."""
+    runs = []
+    for value in sorted(ids):
+        if runs and value == runs[-1][1] + 1:
+            runs[-1][1] = value
+        else:
+            runs.append([value, value])
+    return [tuple(run) for run in runs]
+
+def _late_ranges(conn, table_name, catalog, change_seq):
+    """
+    Id ranges at or below the watermark written since the previous backup of the chain
+    (updates, loads with explicit ids and, on PostgreSQL, ids allocated before the watermark
+    that committed after it), read from change_log. None if the chain cannot continue.
+    """
+    if "change_seq" not in catalog:  # cadena anterior al change log
+        return None
+    ids, ranges, replaced = changed_ids(conn, table_name, catalog["change_seq"], change_seq)
+    watermark = catalog["watermark"]
+    if replaced:
+        return None
+    if watermark is None:  # base vacía: el delta ya incluye todas las filas
+        return []
+    late = _id_runs(row_id for row_id in ids if row_id <= watermark)
+    late += [(start_id, min(end_id, watermark)) for start_id, end_id in ranges if start_id <= watermark]
+    return late if len(late) <= MAX_DELTA_RANGES else None
+
+def _swap_chain_dir(tmp_dir, chain_dir):
+    """Replaces the chain directory with a fully written one."""
+    old_dir = f"{chain_dir}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(chain_dir):
+        os.replace(chain_dir, old_dir)
+    os.replace(tmp_dir, chain_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def backup_table_incremental(table_name, new_base=False, batch_size=BATCH_SIZE, codec="deflate"):
+    """
+    Incremental backup: exports only the rows added or changed since the previous backup of the chain.
+
+    The first call (or new_base=True) writes a full base file. The next ones write deltas with
+    the rows above the watermark (the highest id already backed up) plus the rows at or below
+    it that change_log shows as inserted or updated since the previous backup, so rows with
+    explicit low ids or committed late are not skipped. The catalog keeps the last change_log
+    seq covered; every event up to it is committed before the rows are read.
+
+    A new base is written instead of a delta when the chain predates change_log, the table
+    was replaced by a restore, or the changes below the watermark are too scattered
+    (MAX_DELTA_RANGES). A new base is written to a temporary directory and replaces the
+    previous chain only once it is complete. Deletes are not captured; start a new base
+    to drop deleted rows.
+
+    Args:
+        table_name: Table to back up (needs an integer `id` column)
+        new_base: Start a new chain with a full backup
+        batch_size: Rows fetched from the cursor per batch
+        codec: AVRO block codec
+
+    Returns:
+        dict: Message and catalog entry, or error
+    """
+    try:
+        table = _reflect_table(table_name)
+        if table is None:
+            return {"error": f"La tabla {table_name} no existe."}
+        if "id" not in table.c:
+            return {"error": f"La tabla {table_name} no tiene columna id para el watermark."}
+
+        chain_dir = _chain_dir(table_name)
+        catalog = None if new_base else get_backup_catalog(table_name)
+
+        with engine.connect() as conn:
+            # Primero el seq: los eventos hasta él ya están commiteados, así las filas leídas
+            # después los incluyen; lo que llegue más tarde entra en el próximo delta
+            change_seq = last_seq(conn)
+            high = conn.execute(select(func.max(table.c.id))).scalar()
+            late = None if catalog is None else _late_ranges(conn, table_name, catalog, change_seq)
+
+        if catalog is not None and late is None:
+            logger.info("La cadena de %s no puede continuar con un delta, se escribe una base nueva", table_name)
+            catalog = None
+
+        if catalog is None:
+            tmp_dir = f"{chain_dir}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            file_name = "00000-base.avro"
+            try:
+                rows = _write_avro_file(os.path.join(tmp_dir, file_name), table, batch_size, codec)
+            except BaseException:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+            entry = {
+                "seq": 0,
+                "kind": "base",
+                "file": file_name,
+                "min_id": None,
+                "max_id": high,
+                "rows": rows,
+                "sha256": _file_sha256(os.path.join(tmp_dir, file_name)),
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }
+            catalog = {"table": table_name, "key": "id", "watermark": high, "change_seq": change_seq, "entries": [entry]}
+            _write_json(os.path.join(tmp_dir, CATALOG_FILE), catalog)
+            _swap_chain_dir(tmp_dir, chain_dir)
+            return {"message": f"Base backup of {table_name} saved in {os.path.join(chain_dir, file_name)}", "entry": entry}
+
+        watermark = catalog["watermark"]
+        ranges = list(late)
+        if high is not None and (watermark is None or high > watermark):
+            ranges.append((-math.inf if watermark is None else watermark + 1, high))
+        if not ranges:
+            catalog["change_seq"] = change_seq
+            _write_json(os.path.join(chain_dir, CATALOG_FILE), catalog)
+            return {"message": f"No new rows in {table_name} since the last backup", "watermark": watermark}
+
+        seq = len(catalog["entries"])
+        file_name = f"{seq:05d}-delta.avro"
+        file_path = os.path.join(chain_dir, file_name)
+        where = or_(*[table.c.id <= end_id if start_id == -math.inf else table.c.id.between(start_id, end_id)
+                      for start_id, end_id in ranges])
+        rows = _write_avro_file(file_path, table, batch_size, codec, where)
+
+        entry = {
+            "seq": seq,
+            "kind": "delta",
+            "file": file_name,
+            "min_id": None if watermark is None else min(start_id for start_id, _ in ranges),
+            "max_id": max(end_id for _, end_id in ranges),
+            "late_ranges": len(late),
+            "rows": rows,
+            "sha256": _file_sha256(file_path),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        catalog["entries"].append(entry)
+        catalog["watermark"] = max(watermark, high) if watermark is not None else high
+        catalog["change_seq"] = change_seq
+        _write_json(os.path.join(chain_dir, CATALOG_FILE), catalog)
+
+        return {"message": f"Delta backup of {table_name} saved in {file_path}", "entry": entry}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+def restore_table_chain(table_name, upto=None, batch_size=BATCH_SIZE):
+    """
+    Restores a table by replaying its incremental chain (base + deltas) into a staging table.
+
+    Args:
+        table_name: Table to restore (must be defined in models.py)
+        upto: Last catalog entry (seq) to replay; None replays the whole chain
+        batch_size: Records inserted per batch
+
+    Returns:
+        dict: Message, rows and replayed entries, or error
+    """
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return {"error": f"No hay modelo para {table_name}, usar mode=replace."}
+
+    catalog = get_backup_catalog(table_name)
+    if catalog is None:
+        return {"error": f"No incremental backup exists for {table_name}."}
+
+    entries = [entry for entry in catalog["entries"] if upto is None or entry["seq"] <= upto]
+    if not entries:
+        return {"error": f"No backup entries up to {upto} for {table_name}."}
+
+    staging = None
+    try:
+        start = time.perf_counter()
+        staging = _create_staging_table(table)
+        rows = 0
+        for entry in entries:
+            file_path = os.path.join(_chain_dir(table_name), entry["file"])
+            if _file_sha256(file_path) != entry["sha256"]:
+                raise ValueError(f"Checksum inválido en {file_path}")
+            # Los deltas pueden repetir filas ya cargadas (actualizadas o commiteadas tarde): upsert
+            loaded, _ = _load_avro_file(file_path, staging, batch_size, f"{table_name}#{entry['seq']}",
+                                        upsert=entry["kind"] == "delta")
+            rows += loaded
+
+        _swap_staging_table(table, staging)
+        seconds = time.perf_counter() - start
+
+        return {
+            "message": f"Data restored in {table_name} up to backup #{entries[-1]['seq']}",
+            "rows": rows,
+            "entries": len(entries),
+            "seconds": round(seconds, 3),
+            "rows_per_sec": int(rows / seconds) if seconds > 0 else None
+        }
+
+    except Exception as e:
+        logger.error("Error en restore incremental de %s: %s", table_name, e, exc_info=True)
+        if staging is not None:
+            staging.drop(engine, checkfirst=True)
+        return {"error": str(e)}
+
+# Restore selectivo por rango de id usando el índice de bloques
+def _backup_files(table_name, source, start_id, end_id):
+    """AVRO files of a backup that may contain ids in [start_id, end_id]."""
+    if source == "full":
+        return [os.path.join(BACKUP_DIR, f"{table_name}.avro")]
+    if source == "partitioned":
+        part_dir = os.path.join(BACKUP_DIR, table_name)
+        with open(os.path.join(part_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            parts = json.load(f)["parts"]
+        return [os.path.join(part_dir, part["file"]) for part in parts
+                if part["min_id"] <= end_id and part["max_id"] >= start_id]
+    if source == "chain":
+        catalog = get_backup_catalog(table_name) or {"entries": []}
+        return [os.path.join(_chain_dir(table_name), entry["file"]) for entry in catalog["entries"]]
+    raise ValueError(f"Origen de backup desconocido: {source}")
+
+def _read_id_range(file_path, start_id, end_id, stats):
+    """Seeks to the blocks whose id range overlaps [start_id, end_id] and decodes only those."""
+    index_path = _index_path(file_path)
+    if not os.path.exists(index_path):
+        raise ValueError(f"{file_path} no tiene índice de bloques, generar un backup nuevo.")
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if index["key"] != "id" or index["file_size"] != os.path.getsize(file_path):
+        raise ValueError(f"El índice de {file_path} no corresponde al archivo.")
+
+    with open(file_path, "rb") as in_file:
+        header = in_file.read(index["header_size"])
+        for block in index["blocks"]:
+            if block["max_id"] < start_id or block["min_id"] > end_id:
+                continue
+            in_file.seek(block["offset"])
+            # Cabecera + un bloque forman un archivo AVRO válido
+            data = io.BytesIO(header + in_file.read(block["size"]))
+            stats["blocks"] += 1
+            for record in fastavro.reader(data):
+                if start_id <= record["id"] <= end_id:
+                    yield record
+
+def _upsert_rows(conn, table, rows):
+    """INSERT ... ON CONFLICT (pk) DO UPDATE for SQLite and PostgreSQL."""
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key.columns],
+        set_={column.name: statement.excluded[column.name] for column in table.columns if not column.primary_key}
+    )
+    conn.execute(statement, rows)
+
+def restore_id_range(table_name, start_id, end_id, source="full", batch_size=BATCH_SIZE):
+    """
+    Restores only the rows with start_id <= id <= end_id from a backup.
+
+    Uses the block index written next to every AVRO file to decode just the blocks that
+    overlap the range, and upserts the matching rows, leaving the rest of the table untouched.
+
+    Args:
+        table_name: Table to restore (must be defined in models.py)
+        start_id: First id of the range
+        end_id: Last id of the range
+        source: Backup to read from: full, partitioned or chain
+
+    Returns:
+        dict: Message, rows, decoded blocks and time, or error
+    """
+    table = Base.metadata.tables.get(table_name)
+    if table is None:
+        return {"error": f"No hay modelo para {table_name}."}
+    if start_id > end_id:
+        return {"error": "start_id debe ser menor o igual que end_id."}
+
+    try:
+        start = time.perf_counter()
+        files = [path for path in _backup_files(table_name, source, start_id, end_id) if os.path.exists(path)]
+        if not files:
+            return {"error": f"No {source} backup exists for {table_name}."}
+
+        stats = {"blocks": 0}
+        rows = 0
+        with engine.begin() as conn:
+            for file_path in files:
+                records = _read_id_range(file_path, start_id, end_id, stats)
+                for batch in _read_batches(records, table, batch_size):
+                    _upsert_rows(conn, table, batch)
+                    rows += len(batch)
+            if rows:
+                bump_table_version(conn, table_name)
+                record_change(conn, table_name, RESTORE_RANGE, data={"start_id": start_id, "end_id": end_id, "rows": rows})
+                if table_name == "hired_employees":
+                    reindex_id_range(conn, start_id, end_id)
+
+        return {
+            "message": f"Restored ids {start_id}-{end_id} of {table_name}",
+            "rows": rows,
+            "blocks": stats["blocks"],
+            "seconds": round(time.perf_counter() - start, 4)
+        }
+
+    except Exception as e:
+        logger.error("Error en restore por rango de %s: %s", table_name, e, exc_info=True)
+        return {"error": str(e)}
@@ -0,0 +1,138 @@
+# changes.py
+import json
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, select, text
+
+from models import ChangeLog
+
+# Operaciones registradas en change_log
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+BULK_INSERT = "bulk_insert"      # data: {"ids": [...]} de un lote cargado
+RESTORE = "restore"              # la tabla se reemplazó completa: los consumidores deben resincronizarla
+RESTORE_RANGE = "restore_range"  # data: {"start_id", "end_id", "rows"} reescritos desde un backup
+
+# El siguiente seq sale de una fila contador en table_versions (la "versión" de change_log),
+# no de un autoincrement: la fila queda bloqueada hasta el commit, así ninguna transacción
+# obtiene un seq mayor mientras otra con un seq menor sigue abierta. Los seq quedan en
+# orden de commit en todas las tablas y sin huecos (un rollback devuelve el número).
+CHANGE_SEQ_KEY = "change_log"
+_NEXT_SEQ = text(
+    "INSERT INTO table_versions (table_name, version) VALUES (:key, 1) "
+    "ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1 "
+    "RETURNING version"
+)
+_INIT_SEQ = text(
+    "INSERT INTO table_versions (table_name, version) "
+    "SELECT :key, COALESCE(MAX(seq), 0) FROM change_log WHERE true "  # WHERE: SQLite lo exige antes de ON CONFLICT
+    "ON CONFLICT (table_name) DO NOTHING"
+)
+
+def row_data(obj) -> dict:
+    """Column values of an ORM object, as stored in the change event."""
+    return {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
+
+def init_change_seq(conn) -> None:
+    """Creates the seq counter, continuing after the events already in change_log (migration step)."""
+    conn.execute(_INIT_SEQ, {"key": CHANGE_SEQ_KEY})
+
+def record_change(conn, table_name: str, operation: str, row_id: Optional[int] = None, data: Optional[dict] = None) -> None:
+    """
+    Appends an event to the change log.
+
+    Must be called inside the transaction that modifies the table, after
+    bump_table_version. The seq counter row stays locked until commit, so a
+    consumer that has read seq N has already seen every event below N.
+
+    Args:
+        conn: Session or Connection with an open transaction
+        table_name: Modified table
+        operation: INSERT, UPDATE, DELETE, BULK_INSERT, RESTORE or RESTORE_RANGE
+        row_id: Id of the row (single-row operations)
+        data: Row values or operation details (stored as JSON)
+    """
+    seq = conn.execute(_NEXT_SEQ, {"key": CHANGE_SEQ_KEY}).scalar_one()
+    conn.execute(insert(ChangeLog).values(
+        seq=seq,
+        table_name=table_name,
+        operation=operation,
+        row_id=row_id,
+        data=json.dumps(data, default=str) if data is not None else None,
+        changed_at=datetime.now(timezone.utc).isoformat()
+    ))
+
+def last_seq(conn) -> int:
+    """Highest seq in the change log (0 if empty). Every event up to it is already committed."""
+    return conn.execute(select(func.coalesce(func.max(ChangeLog.seq), 0))).scalar()
+
+def changed_ids(conn, table_name: str, after: int, upto: int) -> Tuple[Set[int], List[Tuple[int, int]], bool]:
+    """
+    Rows of a table inserted or updated by the events with after < seq <= upto.
+
+    Returns:
+        tuple: (ids, [(start_id, end_id)] rewritten by range restores, True if the whole table was replaced)
+    """
+    query = (select(ChangeLog.operation, ChangeLog.row_id, ChangeLog.data)
+             .where(ChangeLog.table_name == table_name, ChangeLog.seq > after, ChangeLog.seq <= upto,
+                    ChangeLog.operation != DELETE))
+    ids, ranges, replaced = set(), [], False
+    for operation, row_id, data in conn.execute(query):
+        if operation == RESTORE:
+            replaced = True
+        elif operation == BULK_INSERT:
+            ids.update(json.loads(data)["ids"])
+        elif operation == RESTORE_RANGE:
+            details = json.loads(data)
+            ranges.append((details["start_id"], details["end_id"]))
+        elif row_id is not None:
+            ids.add(row_id)
+    return ids, ranges, replaced
+
+def read_changes(db, since: int, limit: int, table_name: Optional[str] = None) -> list:
+    """
+    Returns up to `limit` events with seq > since, ordered by seq.
+
+    Args:
+        db: Database session or connection
+        since: Last sequence number already processed by the consumer
+        limit: Maximum number of events
+        table_name: Only events of this table
+
+    Returns:
+        list: Events as dicts
+    """
+    query = select(ChangeLog).where(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit)
+    if table_name:
+        query = query.where(ChangeLog.table_name == table_name)
+    return [
+        {
+            "seq": change.seq,
+            "table": change.table_name,
+            "op": change.operation,
+            "id": change.row_id,
+            "data": json.loads(change.data) if change.data else None,
+            "changed_at": change.changed_at,
+        }
+        for change in db.execute(query).scalars()
+    ]
+
+def stream_changes(session_factory, since: int, limit: int, table_name: Optional[str] = None,
+                   batch_size: int = 1000) -> Iterator[str]:
+    """
+    Yields the events after `since` as NDJSON, one batch per query.
+
+    Each batch uses its own short session, so a slow consumer does not keep a
+    connection open. The last `seq` received is the `since` of the next call.
+    """
+    sent = 0
+    while sent < limit:
+        with session_factory() as db:
+            events = read_changes(db, since, min(batch_size, limit - sent), table_name)
+        if not events:
+            break
+        yield "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        since = events[-1]["seq"]
+        sent += len(events)
@@ -1,9 +1,41 @@
 
-from sqlalchemy import func
+from sqlalchemy import bindparam, delete, func, insert, select, update
 from fastapi import HTTPException
 from models import HiredEmployee, Department, Job, EmployeeCreate, DepartmentCreate, JobCreate
 from database import engine, Session
-from logger import logger
+from logger import setup_logger
+from versioning import bump_table_version
+from changes import record_change, row_data, INSERT, UPDATE, DELETE
+from search import index_employees, unindex_employees
+
+logger = setup_logger("app.crud")
+
+# Statements de una fila construidos una vez por modelo: cada llamada solo aporta los
+# parámetros y SQLAlchemy reutiliza su forma compilada. INSERT/UPDATE devuelven la fila
+# escrita con RETURNING (sin refresh) y DELETE solo el id (sin cargar la fila antes).
+_INSERT = {model: insert(model).returning(model) for model in (HiredEmployee, Department, Job)}
+_UPDATE = {
+    model: update(model)
+    .where(model.id == bindparam("row_id"))
+    .values({column.name: bindparam(f"new_{column.name}") for column in model.__table__.columns if column.name != "id"})
+    .returning(model)
+    for model in (HiredEmployee, Department, Job)
+}
+_DELETE = {model: delete(model).where(model.id == bindparam("row_id")).returning(model.id)
+           for model in (HiredEmployee, Department, Job)}
+
+def _insert_row(db: Session, model, data: dict):
+    """Inserts a row and returns it as an ORM object (one INSERT ... RETURNING)."""
+    return db.execute(_INSERT[model], data).scalar_one()
+
+def _update_row(db: Session, model, row_id: int, data: dict):
+    """Updates a row and returns it, or None if it does not exist (one UPDATE ... RETURNING)."""
+    params = {f"new_{key}": value for key, value in data.items()}
+    return db.execute(_UPDATE[model], {"row_id": row_id, **params}).scalar_one_or_none()
+
+def _delete_row(db: Session, model, row_id: int) -> bool:
+    """Deletes a row by id (one DELETE ... RETURNING id). False if it did not exist."""
+    return db.execute(_DELETE[model], {"row_id": row_id}).scalar_one_or_none() is not None
 
 
 # Función genérica para paginación
@@ -47,65 +79,153 @@ def get_paginated_records(
 
 def create_employee(db: Session, employee: EmployeeCreate):
     try:
-        db_employee = HiredEmployee(**employee.dict())
-        db.add(db_employee)
+        db_employee = _insert_row(db, HiredEmployee, employee.dict())
+        bump_table_version(db, HiredEmployee.__tablename__)
+        record_change(db, HiredEmployee.__tablename__, INSERT, db_employee.id, row_data(db_employee))
+        index_employees(db, [db_employee.id], [db_employee.name], replace=False)
         db.commit()
-        db.refresh(db_employee)
-        logger.info(f"Employee creado: ID {db_employee.id}")
+        logger.info("Employee creado: ID %s", db_employee.id)
         return db_employee
     except Exception as e:
-        logger.error(f"Error creando employee: {str(e)}", exc_info=True)
+        logger.error("Error creando employee: %s", e, exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail="Error interno")
 
-def get_employee(db: Session, employee_id: int):
-    employee = db.query(HiredEmployee).filter(HiredEmployee.id == employee_id).first()
+# Relaciones que se pueden expandir en las lecturas de employees: nombre -> (modelo, columna, FK)
+EXPANDABLE = {
+    "department": (Department, Department.department, HiredEmployee.department_id),
+    "job": (Job, Job.job, HiredEmployee.job_id),
+}
+
+def parse_expand(expand: str = None) -> tuple:
+    """Parses expand=department,job (400 on unknown names)."""
+    names = tuple(dict.fromkeys(name.strip() for name in (expand or "").split(",") if name.strip()))
+    unknown = [name for name in names if name not in EXPANDABLE]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot expand {', '.join(unknown)}; use {', '.join(EXPANDABLE)}")
+    return names
+
+def _expanded_query(expand: tuple):
+    """Employees with the names of the expanded relations, in one query with LEFT JOINs."""
+    query = select(HiredEmployee)
+    for name in expand:
+        model, column, foreign_key = EXPANDABLE[name]
+        query = query.add_columns(column).outerjoin(model, model.id == foreign_key)
+    return query
+
+def _expanded_rows(rows, expand: tuple) -> list:
+    records = []
+    for employee, *names in rows:
+        record = row_data(employee)
+        for name, value in zip(expand, names):
+            foreign_id = record[f"{name}_id"]
+            record[name] = {"id": foreign_id, name: value} if value is not None else None
+        records.append(record)
+    return records
+
+def get_employee(db: Session, employee_id: int, expand: tuple = ()):
+    if expand:
+        rows = db.execute(_expanded_query(expand).where(HiredEmployee.id == employee_id)).all()
+        if not rows:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        return _expanded_rows(rows, expand)[0]
+
+    employee = db.get(HiredEmployee, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     return employee
 
-def get_all_employees(db: Session, page: int = 1, limit: int = 50):
-    return get_paginated_records(db, HiredEmployee, page, limit)
+def get_all_employees(db: Session, page: int = 1, limit: int = 50, expand: tuple = ()):
+    if not expand:
+        return get_paginated_records(db, HiredEmployee, page, limit)
+
+    if page < 1 or limit < 1:
+        raise HTTPException(status_code=400, detail="Invalid pagination parameters")
+
+    total = db.query(func.count(HiredEmployee.id)).scalar()
+    query = _expanded_query(expand).order_by(HiredEmployee.id).offset((page - 1) * limit).limit(limit)
+
+    return {
+        "data": _expanded_rows(db.execute(query).all(), expand),
+        "meta": {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "pages": (total + limit - 1) // limit
+        }
+    }
+
+def get_employees_by_ids(db: Session, ids: list, expand: tuple = ()) -> dict:
+    """
+    Fetches many employees with one IN query.
+
+    Args:
+        db: Database session
+        ids: Employee ids (the response keeps this order)
+        expand: Relations to expand (see EXPANDABLE)
+
+    Returns:
+        dict: Data in the requested order + ids that do not exist
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    if expand:
+        rows = db.execute(_expanded_query(expand).where(HiredEmployee.id.in_(unique_ids))).all()
+        found = {record["id"]: record for record in _expanded_rows(rows, expand)}
+    else:
+        found = {employee.id: employee for employee in db.execute(
+            select(HiredEmployee).where(HiredEmployee.id.in_(unique_ids))
+        ).scalars()}
+
+    return {
+        "data": [found[employee_id] for employee_id in unique_ids if employee_id in found],
+        "meta": {
+            "requested": len(unique_ids),
+            "found": len(found),
+            "missing": [employee_id for employee_id in unique_ids if employee_id not in found]
+        }
+    }
 
 def update_employee(db: Session, employee_id: int, employee_data: EmployeeCreate):
-    employee = db.query(HiredEmployee).filter(HiredEmployee.id == employee_id).first()
+    employee = _update_row(db, HiredEmployee, employee_id, employee_data.dict())
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    
-    for key, value in employee_data.dict().items():
-        setattr(employee, key, value)
-    
+
+    bump_table_version(db, HiredEmployee.__tablename__)
+    record_change(db, HiredEmployee.__tablename__, UPDATE, employee.id, row_data(employee))
+    index_employees(db, [employee.id], [employee.name])
     db.commit()
-    db.refresh(employee)
     return employee
 
 def delete_employee(db: Session, employee_id: int):
-    employee = db.query(HiredEmployee).filter(HiredEmployee.id == employee_id).first()
-    if not employee:
-        logger.warning(f"Intento de borrar employee inexistente: ID {employee_id}")  # Log de advertencia
-        raise HTTPException(status_code=404, detail="Employee no encontrado")
-    
     try:
-        db.delete(employee)
-        db.commit()
-        logger.info(f"Employee borrado: ID {employee_id}")  # Log exitoso
-        return {"message": "Employee borrado"}
+        deleted = _delete_row(db, HiredEmployee, employee_id)
+        if deleted:
+            bump_table_version(db, HiredEmployee.__tablename__)
+            record_change(db, HiredEmployee.__tablename__, DELETE, employee_id)
+            unindex_employees(db, [employee_id])
+            db.commit()
     except Exception as e:
-        logger.error(f"Error borrando employee ID {employee_id}: {str(e)}")  # Log de error
+        logger.error("Error borrando employee ID %s: %s", employee_id, e)  # Log de error
         db.rollback()
         raise HTTPException(status_code=500, detail="Error interno")
 
+    if not deleted:
+        logger.warning("Intento de borrar employee inexistente: ID %s", employee_id)  # Log de advertencia
+        raise HTTPException(status_code=404, detail="Employee no encontrado")
+    logger.info("Employee borrado: ID %s", employee_id)  # Log exitoso
+    return {"message": "Employee borrado"}
+
 # Department CRUD Operations
 
 def create_department(db: Session, department: DepartmentCreate):
-    db_department = Department(**department.dict())
-    db.add(db_department)
+    db_department = _insert_row(db, Department, department.dict())
+    bump_table_version(db, Department.__tablename__)
+    record_change(db, Department.__tablename__, INSERT, db_department.id, row_data(db_department))
     db.commit()
-    db.refresh(db_department)
     return db_department
 
 def get_department(db: Session, department_id: int):
-    department = db.query(Department).filter(Department.id == department_id).first()
+    department = db.get(Department, department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
     return department
@@ -114,37 +234,35 @@ def get_all_departments(db: Session, page: int = 1, limit: int = 50):
     return get_paginated_records(db, Department, page, limit)
 
 def update_department(db: Session, department_id: int, department_data: DepartmentCreate):
-    department = db.query(Department).filter(Department.id == department_id).first()
+    department = _update_row(db, Department, department_id, department_data.dict())
     if not department:
         raise HTTPException(status_code=404, detail="Department not found")
-    
-    for key, value in department_data.dict().items():
-        setattr(department, key, value)
-    
+
+    bump_table_version(db, Department.__tablename__)
+    record_change(db, Department.__tablename__, UPDATE, department.id, row_data(department))
     db.commit()
-    db.refresh(department)
     return department
 
 def delete_department(db: Session, department_id: int):
-    department = db.query(Department).filter(Department.id == department_id).first()
-    if not department:
+    if not _delete_row(db, Department, department_id):
         raise HTTPException(status_code=404, detail="Department not found")
-    
-    db.delete(department)
+
+    bump_table_version(db, Department.__tablename__)
+    record_change(db, Department.__tablename__, DELETE, department_id)
     db.commit()
     return {"message": "Department deleted successfully"}
 
 # Job CRUD Operations
 
 def create_job(db: Session, job: JobCreate):
-    db_job = Job(**job.dict())
-    db.add(db_job)
+    db_job = _insert_row(db, Job, job.dict())
+    bump_table_version(db, Job.__tablename__)
+    record_change(db, Job.__tablename__, INSERT, db_job.id, row_data(db_job))
     db.commit()
-    db.refresh(db_job)
     return db_job
 
 def get_job(db: Session, job_id: int):
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = db.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
@@ -153,23 +271,21 @@ def get_all_jobs(db: Session, page: int = 1, limit: int = 50):
     return get_paginated_records(db, Job, page, limit)
 
 def update_job(db: Session, job_id: int, job_data: JobCreate):
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = _update_row(db, Job, job_id, job_data.dict())
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    for key, value in job_data.dict().items():
-        setattr(job, key, value)
-    
+
+    bump_table_version(db, Job.__tablename__)
+    record_change(db, Job.__tablename__, UPDATE, job.id, row_data(job))
     db.commit()
-    db.refresh(job)
     return job
 
 def delete_job(db: Session, job_id: int):
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+    if not _delete_row(db, Job, job_id):
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    db.delete(job)
+
+    bump_table_version(db, Job.__tablename__)
+    record_change(db, Job.__tablename__, DELETE, job_id)
     db.commit()
     return {"message": "Job deleted successfully"}
 
@@ -1,56 +1,286 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
 import pandas as pd
-import logging
 
-from sqlalchemy import create_engine, text
+from models import TABLE_COLUMNS
 from validators import validate_record
-from datetime import datetime
+from versioning import bump_table_version
+from changes import record_change, BULK_INSERT
+from search import index_employees
+from logger import setup_logger, init_worker_logging, worker_log_queue
 
-# Configure logging to record errors
-logging.basicConfig(filename='data_load.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Mismo pipeline de logs que la API; los registros inválidos van a un logger con límite de tasa
+logger = setup_logger("app.loader")
+reject_logger = setup_logger("app.loader.rejects")
 
-import pandas as pd
-import logging
-from sqlalchemy import text
-from validators import validate_record
+# Tamaño aproximado de cada rango de bytes en la carga paralela
+RANGE_SIZE = 8 * 1024 * 1024
+
+def _table_columns(table_name):
+    if table_name not in TABLE_COLUMNS:
+        raise ValueError(f"Tabla {table_name} no reconocida.")
+    return TABLE_COLUMNS[table_name]
+
+def _check_chunk(chunk, table_name):
+    """
+    Valida las filas de un DataFrame sin registrar los rechazos.
+
+    Returns:
+        tuple: (registros válidos, [(fila del chunk, errores)])
+    """
+    chunk = chunk.astype(object).where(pd.notnull(chunk), None)
+    valid_records = []
+    rejects = []
+
+    for i, record in enumerate(chunk.to_dict("records")):
+        if all(value is None for value in record.values()):
+            continue
+        errors = validate_record(record, table_name)
+        if not errors:
+            valid_records.append(record)
+        else:
+            rejects.append((i, errors))
+
+    return valid_records, rejects
+
+def _log_rejects(rejects, table_name, first_line, source="CSV"):
+    for i, errors in rejects:
+        reject_logger.warning("Registro inválido en %s (%s, línea %s): %s", source, table_name, first_line + i, errors)
+
+def _validate_chunk(chunk, table_name, first_line, source="CSV"):
+    """
+    Valida las filas de un DataFrame leído de un CSV sin cabecera (o de un row group Parquet).
+
+    El chunk se lee con skip_blank_lines=False, así la fila i corresponde a la línea
+    first_line + i del archivo; las líneas vacías se ignoran sin contarlas como inválidas.
+    En Parquet la "línea" es el número de fila del archivo.
+
+    Returns:
+        tuple: (registros válidos, cantidad de rechazados)
+    """
+    valid_records, rejects = _check_chunk(chunk, table_name)
+    _log_rejects(rejects, table_name, first_line, source)
+    return valid_records, len(rejects)
+
+def _write_records(engine, table_name, records):
+    df_valid = pd.DataFrame(records)
+    with engine.begin() as conn:  # Datos y versión de la tabla en la misma transacción
+        df_valid.to_sql(table_name, con=conn, if_exists='append', index=False)
+        bump_table_version(conn, table_name)
+        record_change(conn, table_name, BULK_INSERT, data={"ids": [int(i) for i in df_valid["id"]]})
+        if table_name == "hired_employees":
+            index_employees(conn, df_valid["id"], df_valid["name"])
+    logger.info("%s registros válidos insertados en %s.", len(records), table_name)
+
+def load_csv_to_db(csv_file, table_name, db, chunksize=1000, mode="chunked", workers=None):
+    """
+    Carga un CSV sin cabecera validando cada registro.
+
+    Args:
+        csv_file: Ruta del archivo
+        table_name: Tabla destino (hired_employees, departments o jobs)
+        db: Sesión de base de datos (se usa su engine)
+        chunksize: Filas por lote en el modo "chunked"
+        mode: "chunked" (un solo proceso), "parallel" (rangos de bytes en varios procesos)
+            o "arrow" (record batches de pyarrow, ver arrow_loader)
+        workers: Procesos del modo "parallel" (por defecto uno por CPU)
+    """
+    if mode == "parallel":
+        return load_csv_parallel(csv_file, table_name, db, workers=workers)
+    if mode == "arrow":
+        from arrow_loader import load_csv_arrow  # pyarrow solo se importa si se usa este modo
+
+        return load_csv_arrow(csv_file, table_name, db)
+    if mode != "chunked":
+        return {"error": f"Modo de carga {mode} no reconocido. Use chunked, parallel o arrow"}
 
-def load_csv_to_db(csv_file, table_name, db, chunksize=1000):
     try:
         engine = db.bind  # Obtener el engine desde la sesión
+        column_names = _table_columns(table_name)
+        valid_rows = 0
+        line = 1
+
+        for chunk in pd.read_csv(csv_file, header=None, names=column_names, chunksize=chunksize, skip_blank_lines=False):
+            valid_records, _ = _validate_chunk(chunk, table_name, line)
+            line += len(chunk)
+
+            if valid_records:
+                _write_records(engine, table_name, valid_records)
+                valid_rows += len(valid_records)
+
+        return {"message": f"{valid_rows} registros insertados exitosamente."}
+
+    except Exception as e:
+        logger.error("Error cargando %s desde %s: %s", table_name, csv_file, e)
+        return {"error": str(e)}
+
+def _split_ranges(csv_file, range_size=RANGE_SIZE):
+    """
+    Divide el archivo en rangos de bytes alineados a saltos de línea.
 
-        if table_name == 'hired_employees':
-            column_names = ['id', 'name', 'datetime', 'department_id', 'job_id']
-        elif table_name == 'departments':
-            column_names = ['id', 'department']
-        elif table_name == 'jobs':
-            column_names = ['id', 'job']
+    Cada corte salta a su offset y avanza solo hasta el siguiente '\\n', así ninguna
+    fila queda partida (se asume que los campos no contienen saltos de línea) y el
+    archivo no se lee completo. Las líneas de cada rango las cuentan los workers.
+
+    Returns:
+        list: [(inicio, fin)]
+    """
+    size = os.path.getsize(csv_file)
+    ranges = []
+    start = 0
+
+    with open(csv_file, "rb") as f:
+        while start < size:
+            f.seek(start + range_size)
+            f.readline()  # avanzar hasta el final de la línea en curso
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+def _parse_range(csv_file, table_name, start, end):
+    """
+    Worker: lee y valida un rango de bytes.
+
+    Returns:
+        tuple: (DataFrame válido, [(fila del rango, errores)], líneas del rango)
+    """
+    column_names = _table_columns(table_name)
+    with open(csv_file, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.count(b"\n")
+
+    try:
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=column_names, skip_blank_lines=False)
+    except pd.errors.EmptyDataError:  # rango con solo líneas vacías
+        return pd.DataFrame(columns=column_names), [], lines
+    valid_records, rejects = _check_chunk(chunk, table_name)
+    return pd.DataFrame(valid_records, columns=column_names), rejects, lines
+
+def load_csv_parallel(csv_file, table_name, db, workers=None, range_size=RANGE_SIZE):
+    """
+    Carga un CSV grande repartiendo rangos de bytes entre procesos.
+
+    Los workers leen, parsean y validan su rango y devuelven los registros válidos,
+    los rechazos y las líneas del rango; el proceso principal es el único escritor,
+    así la carga funciona también con SQLite. Los rechazos se registran con el número
+    de línea real del archivo en cuanto se conocen las líneas de los rangos anteriores.
+    Solo se mantienen en vuelo 2 rangos por worker para acotar la memoria.
+
+    Args:
+        csv_file: Ruta del archivo
+        table_name: Tabla destino
+        db: Sesión de base de datos (se usa su engine)
+        workers: Procesos (por defecto uno por CPU)
+        range_size: Tamaño aproximado de cada rango en bytes
+    """
+    try:
+        engine = db.bind
+        _table_columns(table_name)
+        start_time = time.perf_counter()
+        ranges = _split_ranges(csv_file, range_size)
+        valid_rows = 0
+        rejected_rows = 0
+        # Rechazos por índice de rango, hasta conocer la primera línea del rango
+        unlogged = {}
+        next_range, next_line = 0, 1
+
+        def handle(index, result):
+            nonlocal valid_rows, rejected_rows, next_range, next_line
+            df_valid, rejects, lines = result
+            rejected_rows += len(rejects)
+            if not df_valid.empty:
+                _write_records(engine, table_name, df_valid)
+                valid_rows += len(df_valid)
+            unlogged[index] = (rejects, lines)
+            while next_range in unlogged:
+                rejects, lines = unlogged.pop(next_range)
+                _log_rejects(rejects, table_name, next_line)
+                next_range, next_line = next_range + 1, next_line + lines
+
+        if len(ranges) <= 1:
+            # Un solo rango: no vale la pena arrancar procesos
+            for index, r in enumerate(ranges):
+                handle(index, _parse_range(csv_file, table_name, *r))
         else:
-            raise ValueError(f"Tabla {table_name} no reconocida.")
+            workers = workers or max(1, min(len(ranges), os.cpu_count() or 1))
+            # spawn y logs por la cola del padre (ver backup_restore._process_pool)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=init_worker_logging, initargs=(worker_log_queue(),)) as pool:
+                pending = {}
+                queue = list(enumerate(ranges))
+                while queue or pending:
+                    while queue and len(pending) < workers * 2:
+                        index, r = queue.pop(0)
+                        pending[pool.submit(_parse_range, csv_file, table_name, *r)] = index
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        handle(pending.pop(future), future.result())
+
+        seconds = time.perf_counter() - start_time
+        logger.info(
+            "Carga paralela de %s: %s registros válidos, %s rechazados, %s rangos en %.2fs (%.0f filas/s)",
+            table_name, valid_rows, rejected_rows, len(ranges), seconds, (valid_rows + rejected_rows) / max(seconds, 1e-9)
+        )
+        return {"message": f"{valid_rows} registros insertados exitosamente.", "rejected": rejected_rows, "ranges": len(ranges)}
+
+    except Exception as e:
+        logger.error("Error cargando %s desde %s: %s", table_name, csv_file, e)
+        return {"error": str(e)}
+
+def load_parquet_to_db(parquet_file, table_name, db):
+    """
+    Carga un archivo Parquet un row group a la vez.
+
+    Solo se leen las columnas de la tabla destino; cada row group pasa por la misma
+    validación y escritura que los lotes del CSV. Las columnas timestamp se escriben
+    en UTC con el formato ISO de los CSV (2021-11-07T02:48:42Z).
+
+    Args:
+        parquet_file: Ruta del archivo
+        table_name: Tabla destino (hired_employees, departments o jobs)
+        db: Sesión de base de datos (se usa su engine)
+    """
+    try:
+        import pyarrow as pa  # pyarrow solo se importa si hay archivos Parquet
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        engine = db.bind
+        column_names = _table_columns(table_name)
+        parquet = pq.ParquetFile(parquet_file)
+
+        missing = [name for name in column_names if name not in parquet.schema_arrow.names]
+        if missing:
+            raise ValueError(f"Faltan columnas en {parquet_file}: {missing}")
 
-        valid_records = []  
         valid_rows = 0
+        rejected_rows = 0
+        first_row = 1
+        for group in range(parquet.num_row_groups):
+            table = parquet.read_row_group(group, columns=column_names)
+            for i, field in enumerate(table.schema):
+                if pa.types.is_timestamp(field.type):
+                    # En UTC, como indica la Z (los timestamps sin zona se toman como UTC)
+                    seconds = pc.cast(table.column(i), pa.timestamp("s", tz="UTC"), safe=False)
+                    table = table.set_column(i, field.name, pc.strftime(seconds, format="%Y-%m-%dT%H:%M:%SZ"))
 
-        for chunk in pd.read_csv(csv_file, header=None, names=column_names, chunksize=chunksize):
-            chunk = chunk.where(pd.notnull(chunk), None)  # ✅ Corregir paréntesis
-            
-            for _, row in chunk.iterrows():
-                record = row.to_dict()
-                errors = validate_record(record, table_name)
-                
-                if not errors:
-                    valid_records.append(record)
-                else:
-                    logging.warning(f"Registro inválido en CSV ({table_name}): {errors}")
-
-            if valid_records: 
-                df_valid = pd.DataFrame(valid_records)
-                df_valid.to_sql(table_name, con=engine, if_exists='append', index=False)  # Usar engine
-                logging.info(f"{len(valid_records)} registros válidos insertados en {table_name}.")
-                valid_rows += len(valid_records)
+            valid_records, rejected = _validate_chunk(table.to_pandas(), table_name, first_row, source="Parquet")
+            first_row += table.num_rows
+            rejected_rows += rejected
 
-            valid_records = []  # Limpiar lista para el siguiente lote
+            if valid_records:
+                _write_records(engine, table_name, valid_records)
+                valid_rows += len(valid_records)
 
-        return {"message": f"{valid_rows} registros insertados exitosamente."}
+        return {"message": f"{valid_rows} registros insertados exitosamente.", "rejected": rejected_rows}
 
     except Exception as e:
-        logging.error(f"Error cargando {table_name} desde {csv_file}: {str(e)}")
-        return {"error": str(e)}
\ No newline at end of file
+        logger.error("Error cargando %s desde %s: %s", table_name, parquet_file, e)
+        return {"error": str(e)}
@@ -1,10 +1,15 @@
-from core import DATABASE_URL
+from core import DATABASE_URL, HEAVY_DB_POOL_SIZE, HEAVY_DB_POOL_TIMEOUT
+from admission import heavy_pool_size
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-engine = create_engine(DATABASE_URL, connect_args={"sslmode": "require"})
+# sslmode solo aplica a PostgreSQL (SQLite se usa en local y en los benchmarks)
+connect_args = {"sslmode": "require"} if DATABASE_URL.startswith("postgresql") else {}
+engine = create_engine(DATABASE_URL, connect_args=connect_args)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: the CRUD functions return the rows they wrote (RETURNING);
+# expiring them on commit would reload each one with another SELECT while serializing
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Session = SessionLocal
 # Dependency to get the database session
 def get_db():
@@ -14,7 +19,34 @@ def get_db():
     finally:
         db.close()
 
+# Heavy work (loads, backups/restores, reports) gets its own bounded pool, so it can never
+# take the connections the CRUD endpoints need (no overflow: extra work waits for a connection).
+# By default it has exactly the connections the admitted jobs can use at the same time.
+heavy_engine = create_engine(
+    DATABASE_URL,
+    connect_args=connect_args,
+    pool_size=HEAVY_DB_POOL_SIZE or heavy_pool_size(),
+    max_overflow=0,
+    pool_timeout=HEAVY_DB_POOL_TIMEOUT
+)
+HeavySessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=heavy_engine)
 
+# Dependency to get a session on the heavy pool
+def get_heavy_db():
+    db = HeavySessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
 
 
+def init_db():
+    """Creates the tables defined in models.py, the change log counter and the name search index (explicit migration step, run before starting the API)."""
+    from models import Base
+    from search import create_search_index
+    from changes import init_change_seq
 
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        init_change_seq(conn)
+        create_search_index(conn)
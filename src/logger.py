@@ -1,45 +1,177 @@
 # logger.py
+import atexit
+import copy
+import json
 import logging
+import multiprocessing
+import os
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
 
 # Configurar directorio de logs
-LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
+LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
 LOG_FILE = LOG_DIR / "api.log"
 
 # Formato común
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-def setup_logger(name: str = "app") -> logging.Logger:
+# Logger raíz de la aplicación: los demás ("app.api", "app.loader", ...) propagan hacia él
+APP_LOGGER = "app"
+
+# Muestreo y límite por logger, p. ej. LOG_SAMPLING="app.api=0.1" y LOG_RATE_LIMITS="app.loader.rejects=20"
+DEFAULT_RATE_LIMITS = {"app.loader.rejects": 20}
+
+# Registros en espera de escritura; con la cola llena se descartan y se cuentan
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Atributos estándar de LogRecord (lo demás viene de extra= y se añade al JSON)
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+_queue_handler = None
+_worker_queue = None
+_worker_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line, including the `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction `rate` of the records below WARNING; warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
     """
-    Configura un logger con manejo de archivos rotativos y consola.
-    
-    Args:
-        name: Nombre del logger (por defecto 'app').
+    Token bucket: lets through at most `per_second` records per second (bursts up to `burst`).
 
-    Returns:
-        logging.Logger: Logger configurado.
+    The number of dropped records is added as `dropped` to the next record that passes.
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
 
-    # Evitar logs duplicados
-    if logger.handlers:
-        return logger
+    def __init__(self, per_second: float, burst: int = None):
+        super().__init__()
+        self.per_second = per_second
+        self.burst = burst or max(1, int(per_second))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+            self.updated = now
+            if self.tokens < 1:
+                self.dropped += 1
+                return False
+            self.tokens -= 1
+            if self.dropped:
+                record.dropped = self.dropped
+                self.dropped = 0
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves the JSON formatting to the listener thread.
+
+    prepare() renders the message (msg % args) and the traceback on the caller's thread, so
+    the record carries the values as they were when it was logged and can cross a process
+    boundary; serializing it and writing it stays on the listener. Disabled or sampled-out
+    records are filtered before prepare() and cost nothing.
+
+    The queue is bounded: when it is full the record is dropped, and the number of dropped
+    records is added as `queue_dropped` to the next record that gets in.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.total_dropped = 0
+        self.drop_lock = threading.Lock()  # self.lock es el de Handler.handle()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        with self.drop_lock:
+            if self.dropped:
+                record.queue_dropped = self.dropped
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                self.total_dropped += 1
+                return
+            self.dropped = 0
+
+
+_traceback_formatter = logging.Formatter()
+
 
-    # Formato
-    formatter = logging.Formatter(LOG_FORMAT, DATE_FORMAT)
+class BlockingStopListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full bounded queue instead of failing."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def _parse_settings(value: str) -> dict:
+    settings = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, number = item.partition("=")
+        settings[name.strip()] = float(number)
+    return settings
+
+
+def _build_handlers() -> list:
+    LOG_DIR.mkdir(exist_ok=True)
+    formatter = JsonFormatter()
 
     # Handler para archivo (rotativo: 5 MB x 3 archivos)
     file_handler = RotatingFileHandler(
         LOG_FILE,
         maxBytes=5 * 1024 * 1024,
         backupCount=3,
-        encoding="utf-8"
+        encoding="utf-8",
+        delay=True  # los workers de los pools no llegan a abrir el archivo (ver init_worker_logging)
     )
     file_handler.setFormatter(formatter)
 
@@ -47,11 +179,138 @@ def setup_logger(name: str = "app") -> logging.Logger:
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
 
-    # Añadir handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    return [file_handler, console_handler]
+
+
+def start_logging(handlers: list = None) -> QueueListener:
+    """
+    Starts the asynchronous logging pipeline (idempotent).
+
+    Application loggers only enqueue records (at most LOG_QUEUE_SIZE waiting); a QueueListener
+    thread formats them as JSON and writes them to the rotating file and the console.
+
+    Args:
+        handlers: Output handlers (by default rotating file + stdout).
+
+    Returns:
+        QueueListener: Background listener.
+    """
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        return _listener
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _queue_handler = DeferredQueueHandler(log_queue)
+    _listener = BlockingStopListener(log_queue, *(handlers or _build_handlers()), respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+    app_logger = logging.getLogger(APP_LOGGER)
+    app_logger.setLevel(logging.INFO)
+    app_logger.addHandler(_queue_handler)
+    app_logger.propagate = False
+
+    rate_limits = {**DEFAULT_RATE_LIMITS, **_parse_settings(os.getenv("LOG_RATE_LIMITS", ""))}
+    for name, per_second in rate_limits.items():
+        set_rate_limit(name, per_second)
+    for name, rate in _parse_settings(os.getenv("LOG_SAMPLING", "")).items():
+        set_sampling(name, rate)
+
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flushes the queue and stops the listener thread."""
+    global _listener, _queue_handler, _worker_queue, _worker_listener
+    if _queue_handler is None:
+        return
+    if _worker_listener is not None:
+        _worker_listener.stop()  # primero: vuelca los registros de los workers en la cola principal
+        _worker_listener = None
+        _worker_queue = None
+    if _listener is not None:
+        _listener.stop()
+    logging.getLogger(APP_LOGGER).removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+
+
+def dropped_records() -> int:
+    """Records dropped so far because the queue was full."""
+    return _queue_handler.total_dropped if _queue_handler is not None else 0
+
+
+def worker_log_queue():
+    """
+    Queue for the records of spawned worker processes, drained into this process's pipeline.
+
+    Pass it to the pool as initializer=init_worker_logging, initargs=(worker_log_queue(),),
+    so every record ends up in the single writer of logs/api.log.
+    """
+    global _worker_queue, _worker_listener
+    start_logging()
+    if _worker_queue is None:
+        _worker_queue = multiprocessing.get_context("spawn").Queue(LOG_QUEUE_SIZE)
+        _worker_listener = BlockingStopListener(_worker_queue, _queue_handler)
+        _worker_listener.start()
+    return _worker_queue
+
+
+def init_worker_logging(log_queue) -> None:
+    """
+    Pool initializer: sends the records of this worker process to the parent's queue.
+
+    The worker's own listener is stopped before it writes anything, so only the parent
+    opens and rotates the log file.
+    """
+    global _listener
+    start_logging()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    _queue_handler.queue = log_queue
+
+
+def _replace_filter(name: str, kind: type, new_filter: logging.Filter) -> None:
+    target = logging.getLogger(name)
+    for existing in [f for f in target.filters if isinstance(f, kind)]:
+        target.removeFilter(existing)
+    if new_filter is not None:
+        target.addFilter(new_filter)
+
+
+def set_sampling(name: str, rate: float) -> None:
+    """Keeps only a fraction `rate` (0-1) of the INFO/DEBUG records of a logger (1 disables sampling)."""
+    _replace_filter(name, SamplingFilter, SamplingFilter(rate) if rate < 1 else None)
+
+
+def set_rate_limit(name: str, per_second: float) -> None:
+    """Limits a logger to `per_second` records per second (0 disables the limit)."""
+    _replace_filter(name, RateLimitFilter, RateLimitFilter(per_second) if per_second > 0 else None)
+
+
+def setup_logger(name: str = APP_LOGGER) -> logging.Logger:
+    """
+    Returns a logger connected to the asynchronous JSON pipeline.
+
+    Args:
+        name: Nombre del logger (por defecto 'app'; usar 'app.<módulo>' para los demás).
+
+    Returns:
+        logging.Logger: Logger configurado.
+    """
+    start_logging()
+    logger = logging.getLogger(name)
+
+    # Los loggers fuera de "app" no propagan hacia él: se conectan directamente a la cola
+    if name != APP_LOGGER and not name.startswith(f"{APP_LOGGER}.") and _queue_handler not in logger.handlers:
+        logger.setLevel(logging.INFO)
+        logger.addHandler(_queue_handler)
+        logger.propagate = False
 
     return logger
 
 # Logger principal
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
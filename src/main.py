@@ -1,34 +1,64 @@
 import os
 import uvicorn
 
+from typing import Optional
+
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from brotli_asgi import BrotliMiddleware
 from sqlalchemy.orm import Session
 
 from core import DATA_FOLDER
-from database import get_db, engine
-from models import Base, HiredEmployee, Department, Job
-from backup_restore import backup_table, restore_table
-from upload_json import load_json_to_db
-from data_loader import load_csv_to_db
+from database import get_db, get_heavy_db, heavy_engine, SessionLocal, HeavySessionLocal
+from models import HiredEmployee, Department, Job
 from auth import validate_api_key
+from admission import admit, admitted, get_admission_stats
 from scripts.queries import hired_employees_by_quarter, departments_above_average
 from models import EmployeeCreate, DepartmentCreate, JobCreate
-from logger import logger
+from logger import setup_logger
 from store_results import store_results_in_db
+from versioning import get_table_versions, make_etag, etag_matches, set_etag, not_modified
+from changes import stream_changes
+from search import search_employees, MIN_QUERY_LENGTH
 
 from crud import (
-    create_employee, get_employee, get_all_employees, update_employee, delete_employee,
+    create_employee, get_employee, get_all_employees, get_employees_by_ids, update_employee, delete_employee, parse_expand,
     create_department, get_department, get_all_departments, update_department, delete_department,
     create_job, get_job, get_all_jobs, update_job, delete_job
 )
 
-# Database configuration
-Base.metadata.create_all(engine)
+logger = setup_logger("app.api")
+
+# Schema creation is an explicit step (src/migrate.py), not an import side effect.
+# Ingestion (pandas) and backup (fastavro) modules are imported on first use inside their endpoints.
 
 # Create the FastAPI application
 app = FastAPI()
 
+# Compress large report and page responses (brotli when accepted, gzip otherwise)
+app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
+
+# Tables read by the report endpoints (used to build their ETag)
+REPORT_TABLES = ["hired_employees", "departments", "jobs"]
+
+# Table behind each expandable relation of /employees/ (part of the ETag when expanded)
+EXPANDABLE_TABLES = {"department": "departments", "job": "jobs"}
+
+# Maximum number of ids in a batch lookup
+MAX_BATCH_IDS = 500
+
+def parse_ids(ids: str) -> list:
+    """Parses ids=1,2,3 (400 if an id is not an integer or there are too many)."""
+    try:
+        id_list = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not id_list or len(id_list) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"ids must contain between 1 and {MAX_BATCH_IDS} ids")
+    return id_list
+
 @app.get("/")
 @app.head("/")
 def root():
@@ -38,303 +68,502 @@ def root():
 # Employee Endpoints
 @app.post("/employees/create")
 def create_employee_endpoint(employee: EmployeeCreate, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Attempting to create employee: {employee.dict()}")
+    logger.info("Attempting to create employee")
+    logger.debug("Employee payload: %s", employee)
     try:
         result = create_employee(db, employee)
-        logger.debug(f"Employee created successfully: ID {result.id}")
+        logger.debug("Employee created successfully: ID %s", result.id)
         return result
     except Exception as e:
-        logger.error(f"Error creating employee: {str(e)}", exc_info=True)
+        logger.error("Error creating employee: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/employees/")
 def get_all_employees_endpoint(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     valid: bool = Depends(validate_api_key),
     page: int = Query(1, ge=1),
-    limit: int = Query(50, le=100)
+    limit: int = Query(50, le=100),
+    ids: Optional[str] = Query(None, description="Comma-separated ids to fetch in one lookup"),
+    expand: Optional[str] = Query(None, description="Relations to include: department, job")
 ):
-    logger.info(f"Fetching employees - Page: {page}, Limit: {limit}")
+    logger.info("Fetching employees - Page: %s, Limit: %s, Ids: %s, Expand: %s", page, limit, ids, expand)
+    expand_names = parse_expand(expand)
+    id_list = parse_ids(ids) if ids else None
+    tables = ["hired_employees"] + [EXPANDABLE_TABLES[name] for name in expand_names]
+    etag = make_etag(get_table_versions(db, tables), page, limit, id_list, expand_names)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
-        result = get_all_employees(db, page, limit)
-        logger.debug(f"Found {len(result['data'])} employees")
+        if id_list is not None:
+            result = get_employees_by_ids(db, id_list, expand_names)
+        else:
+            result = get_all_employees(db, page, limit, expand_names)
+        logger.debug("Found %s employees", len(result['data']))
+        set_etag(response, etag)
         return result
     except Exception as e:
-        logger.error(f"Error fetching employees: {str(e)}")
+        logger.error("Error fetching employees: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.get("/employees/search")
+def search_employees_endpoint(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH, description="Name or part of a name"),
+    limit: int = Query(20, ge=1, le=100),
+    fuzzy: bool = Query(True, description="Include approximate (trigram) matches"),
+    db: Session = Depends(get_db),
+    valid: bool = Depends(validate_api_key)
+):
+    logger.info("Searching employees - Q: %s, Limit: %s, Fuzzy: %s", q, limit, fuzzy)
+    q = q.strip()  # min_length se valida antes de quitar los espacios
+    if len(q) < MIN_QUERY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"q must have at least {MIN_QUERY_LENGTH} non-blank characters")
+    etag = make_etag(get_table_versions(db, ["hired_employees"]), q, limit, fuzzy)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    try:
+        result = search_employees(db, q, limit, fuzzy)
+        logger.debug("Found %s employees", len(result))
+        set_etag(response, etag)
+        return {"data": result, "meta": {"q": q, "count": len(result)}}
+    except Exception as e:
+        logger.error("Error searching employees: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/employees/{employee_id}")
-def get_employee_endpoint(employee_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Fetching employee ID: {employee_id}")
+def get_employee_endpoint(
+    employee_id: int,
+    expand: Optional[str] = Query(None, description="Relations to include: department, job"),
+    db: Session = Depends(get_db)
+):
+    logger.info("Fetching employee ID: %s", employee_id)
+    expand_names = parse_expand(expand)
     try:
-        result = get_employee(db, employee_id)
+        result = get_employee(db, employee_id, expand_names)
         return result
     except HTTPException as e:
-        logger.warning(f"Employee not found: ID {employee_id}")
+        logger.warning("Employee not found: ID %s", employee_id)
         raise
     except Exception as e:
-        logger.error(f"Error fetching employee {employee_id}: {str(e)}")
+        logger.error("Error fetching employee %s: %s", employee_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.put("/employees/{employee_id}")
 def update_employee_endpoint(employee_id: int, employee: EmployeeCreate, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Updating employee ID: {employee_id}")
+    logger.info("Updating employee ID: %s", employee_id)
     try:
         result = update_employee(db, employee_id, employee)
-        logger.debug(f"Employee updated successfully: ID {employee_id}")
+        logger.debug("Employee updated successfully: ID %s", employee_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Update failed for employee ID {employee_id}: {e.detail}")
+        logger.warning("Update failed for employee ID %s: %s", employee_id, e.detail)
         raise
     except Exception as e:
-        logger.error(f"Error updating employee {employee_id}: {str(e)}")
+        logger.error("Error updating employee %s: %s", employee_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.delete("/employees/{employee_id}")
 def delete_employee_endpoint(employee_id: int, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Deleting employee ID: {employee_id}")
+    logger.info("Deleting employee ID: %s", employee_id)
     try:
         result = delete_employee(db, employee_id)
-        logger.debug(f"Employee deleted successfully: ID {employee_id}")
+        logger.debug("Employee deleted successfully: ID %s", employee_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Delete failed for employee ID {employee_id}: {e.detail}")
+        logger.warning("Delete failed for employee ID %s: %s", employee_id, e.detail)
         raise
     except Exception as e:
-        logger.error(f"Error deleting employee {employee_id}: {str(e)}")
+        logger.error("Error deleting employee %s: %s", employee_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Department Endpoints
 @app.post("/departments/")
 def create_department_endpoint(department: DepartmentCreate, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Attempting to create department: {department.dict()}")
+    logger.info("Attempting to create department")
+    logger.debug("Department payload: %s", department)
     try:
         result = create_department(db, department)
-        logger.debug(f"Department created successfully: ID {result.id}")
+        logger.debug("Department created successfully: ID %s", result.id)
         return result
     except Exception as e:
-        logger.error(f"Error creating department: {str(e)}", exc_info=True)
+        logger.error("Error creating department: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/departments/")
 def get_all_departments_endpoint(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     valid: bool = Depends(validate_api_key),
     page: int = Query(1, ge=1),
     limit: int = Query(50, le=100)
 ):
-    logger.info(f"Fetching departments - Page: {page}, Limit: {limit}")
+    logger.info("Fetching departments - Page: %s, Limit: %s", page, limit)
+    etag = make_etag(get_table_versions(db, ["departments"]), page, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
         result = get_all_departments(db, page, limit)
-        logger.debug(f"Found {len(result['data'])} departments")
+        logger.debug("Found %s departments", len(result['data']))
+        set_etag(response, etag)
         return result
     except Exception as e:
-        logger.error(f"Error fetching departments: {str(e)}")
+        logger.error("Error fetching departments: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/departments/{department_id}")
 def get_department_endpoint(department_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Fetching department ID: {department_id}")
+    logger.info("Fetching department ID: %s", department_id)
     try:
         result = get_department(db, department_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Department not found: ID {department_id}")
+        logger.warning("Department not found: ID %s", department_id)
         raise
     except Exception as e:
-        logger.error(f"Error fetching department {department_id}: {str(e)}")
+        logger.error("Error fetching department %s: %s", department_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.put("/departments/{department_id}")
 def update_department_endpoint(department_id: int, department: DepartmentCreate, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Updating department ID: {department_id}")
+    logger.info("Updating department ID: %s", department_id)
     try:
         result = update_department(db, department_id, department)
-        logger.debug(f"Department updated successfully: ID {department_id}")
+        logger.debug("Department updated successfully: ID %s", department_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Update failed for department ID {department_id}: {e.detail}")
+        logger.warning("Update failed for department ID %s: %s", department_id, e.detail)
         raise
     except Exception as e:
-        logger.error(f"Error updating department {department_id}: {str(e)}")
+        logger.error("Error updating department %s: %s", department_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.delete("/departments/{department_id}")
 def delete_department_endpoint(department_id: int, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Deleting department ID: {department_id}")
+    logger.info("Deleting department ID: %s", department_id)
     try:
         result = delete_department(db, department_id)
-        logger.debug(f"Department deleted successfully: ID {department_id}")
+        logger.debug("Department deleted successfully: ID %s", department_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Delete failed for department ID {department_id}: {e.detail}")
+        logger.warning("Delete failed for department ID %s: %s", department_id, e.detail)
         raise
     except Exception as e:
-        logger.error(f"Error deleting department {department_id}: {str(e)}")
+        logger.error("Error deleting department %s: %s", department_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Job Endpoints
 @app.post("/jobs/")
 def create_job_endpoint(job: JobCreate, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Attempting to create job: {job.dict()}")
+    logger.info("Attempting to create job")
+    logger.debug("Job payload: %s", job)
     try:
         result = create_job(db, job)
-        logger.debug(f"Job created successfully: ID {result.id}")
+        logger.debug("Job created successfully: ID %s", result.id)
         return result
     except Exception as e:
-        logger.error(f"Error creating job: {str(e)}", exc_info=True)
+        logger.error("Error creating job: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/jobs/")
 def get_all_jobs_endpoint(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     valid: bool = Depends(validate_api_key),
     page: int = Query(1, ge=1),
     limit: int = Query(50, le=100)
 ):
-    logger.info(f"Fetching jobs - Page: {page}, Limit: {limit}")
+    logger.info("Fetching jobs - Page: %s, Limit: %s", page, limit)
+    etag = make_etag(get_table_versions(db, ["jobs"]), page, limit)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     try:
         result = get_all_jobs(db, page, limit)
-        logger.debug(f"Found {len(result['data'])} jobs")
+        logger.debug("Found %s jobs", len(result['data']))
+        set_etag(response, etag)
         return result
     except Exception as e:
-        logger.error(f"Error fetching jobs: {str(e)}")
+        logger.error("Error fetching jobs: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/jobs/{job_id}")
 def get_job_endpoint(job_id: int, db: Session = Depends(get_db)):
-    logger.info(f"Fetching job ID: {job_id}")
+    logger.info("Fetching job ID: %s", job_id)
     try:
         result = get_job(db, job_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Job not found: ID {job_id}")
+        logger.warning("Job not found: ID %s", job_id)
         raise
     except Exception as e:
-        logger.error(f"Error fetching job {job_id}: {str(e)}")
+        logger.error("Error fetching job %s: %s", job_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.put("/jobs/{job_id}")
 def update_job_endpoint(job_id: int, job: JobCreate, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Updating job ID: {job_id}")
+    logger.info("Updating job ID: %s", job_id)
     try:
         result = update_job(db, job_id, job)
-        logger.debug(f"Job updated successfully: ID {job_id}")
+        logger.debug("Job updated successfully: ID %s", job_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Update failed for job ID {job_id}: {e.detail}")
+        logger.warning("Update failed for job ID %s: %s", job_id, e.detail)
         raise
     except Exception as e:
-        logger.error(f"Error updating job {job_id}: {str(e)}")
+        logger.error("Error updating job %s: %s", job_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.delete("/jobs/{job_id}")
 def delete_job_endpoint(job_id: int, db: Session = Depends(get_db), valid: bool = Depends(validate_api_key)):
-    logger.info(f"Deleting job ID: {job_id}")
+    logger.info("Deleting job ID: %s", job_id)
     try:
         result = delete_job(db, job_id)
-        logger.debug(f"Job deleted successfully: ID {job_id}")
+        logger.debug("Job deleted successfully: ID %s", job_id)
         return result
     except HTTPException as e:
-        logger.warning(f"Delete failed for job ID {job_id}: {e.detail}")
+        logger.warning("Delete failed for job ID %s: %s", job_id, e.detail)
         raise
     except Exception as e:
-        logger.error(f"Error deleting job {job_id}: {str(e)}")
+        logger.error("Error deleting job %s: %s", job_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Endpoint to load data
 @app.post("/load-data/")
-def load_data_endpoint(valid: bool = Depends(validate_api_key), db: Session = Depends(get_db)):
-    logger.info("Starting data load process")
+def load_data_endpoint(
+    csv_mode: str = Query("chunked"),
+    workers: Optional[int] = Query(None, ge=1, le=64),
+    valid: bool = Depends(validate_api_key),
+    slot: None = Depends(admit("load")),
+    db: Session = Depends(get_heavy_db)
+):
+    logger.info("Starting data load process (csv mode: %s)", csv_mode)
+    from upload_json import load_json_to_db
+    from data_loader import load_csv_to_db, load_parquet_to_db
+
     try:
+        os.makedirs(DATA_FOLDER, exist_ok=True)
         files = [f for f in os.listdir(DATA_FOLDER) if not f.endswith(".db")]
         processed_files = []
         
-        logger.debug(f"Found {len(files)} files to process in {DATA_FOLDER}")
+        logger.debug("Found %s files to process in %s", len(files), DATA_FOLDER)
         
         for file in files:
             file_path = os.path.join(DATA_FOLDER, file)
-            table_name = os.path.splitext(file)[0]
+            table_name, extension = os.path.splitext(file)
+            file_type = extension.lstrip(".").upper()
             
-            logger.info(f"Processing file: {file_path}")
+            if extension not in (".csv", ".json", ".parquet"):
+                logger.info("Skipping unsupported file: %s", file)
+                processed_files.append({"file": file, "type": file_type, "status": "SKIPPED"})
+                continue
+
+            logger.info("Processing file: %s", file_path)
             
             try:
-                if file.endswith(".csv"):
-                    result = load_csv_to_db(file_path, table_name, db)
-                elif file.endswith(".json"):
+                if extension == ".csv":
+                    result = load_csv_to_db(file_path, table_name, db, mode=csv_mode, workers=workers)
+                elif extension == ".json":
                     result = load_json_to_db(file_path, table_name, db)
+                else:
+                    result = load_parquet_to_db(file_path, table_name, db)
                 
                 if "error" in result:
-                    logger.warning(f"Error processing {file}: {result['error']}")
-                    processed_files.append({"file": file, "type": "CSV" if file.endswith(".csv") else "JSON", "status": "ERROR", "detail": result["error"]})
+                    logger.warning("Error processing %s: %s", file, result['error'])
+                    processed_files.append({"file": file, "type": file_type, "status": "ERROR", "detail": result["error"]})
                 else:
-                    logger.info(f"Successfully processed {file}")
-                    processed_files.append({"file": file, "type": "CSV" if file.endswith(".csv") else "JSON", "status": "OK"})
+                    logger.info("Successfully processed %s", file)
+                    processed_files.append({"file": file, "type": file_type, "status": "OK"})
                     
             except Exception as e:
-                logger.error(f"Error processing {file}: {str(e)}", exc_info=True)
-                processed_files.append({"file": file, "type": "CSV" if file.endswith(".csv") else "JSON", "status": "ERROR", "detail": str(e)})
+                logger.error("Error processing %s: %s", file, e, exc_info=True)
+                processed_files.append({"file": file, "type": file_type, "status": "ERROR", "detail": str(e)})
 
         logger.info("Data load process completed")
         return {"message": "Process completed", "files_processed": processed_files}
 
     except Exception as e:
-        logger.critical(f"Critical error in data load process: {str(e)}", exc_info=True)
+        logger.critical("Critical error in data load process: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error loading data: {str(e)}")
 
 # Backup/Restore Endpoints
+@app.post("/backup-all/")
+def api_backup_all_tables_endpoint(
+    parts: int = Query(1, ge=1, le=64),
+    valid: bool = Depends(validate_api_key),
+    slot: None = Depends(admit("backup"))
+):
+    logger.info("Starting backup of all tables (parts: %s)", parts)
+    from backup_restore import backup_all_tables
+
+    try:
+        result = backup_all_tables(parts)
+        if "error" in result:
+            logger.error("Backup of all tables failed: %s", result['error'])
+            raise HTTPException(status_code=400, detail=result)
+        logger.info("Backup of all tables successful")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Backup error for all tables: %s", e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
 @app.post("/backup/{table_name}")
-def api_backup_table_endpoint(table_name: str, valid: bool = Depends(validate_api_key)):
-    logger.info(f"Starting backup for table: {table_name}")
+def api_backup_table_endpoint(
+    table_name: str,
+    parts: int = Query(1, ge=1, le=64),
+    incremental: bool = Query(False),
+    new_base: bool = Query(False),
+    valid: bool = Depends(validate_api_key),
+    slot: None = Depends(admit("backup"))
+):
+    logger.info("Starting backup for table: %s (parts: %s, incremental: %s)", table_name, parts, incremental)
+    from backup_restore import backup_table, backup_table_partitioned, backup_table_incremental
+
     try:
-        result = backup_table(table_name)
+        if incremental:
+            result = backup_table_incremental(table_name, new_base)
+        elif parts > 1:
+            result = backup_table_partitioned(table_name, parts)
+        else:
+            result = backup_table(table_name)
         if "error" in result:
-            logger.error(f"Backup failed for {table_name}: {result['error']}")
+            logger.error("Backup failed for %s: %s", table_name, result['error'])
             raise HTTPException(status_code=400, detail=result["error"])
-        logger.info(f"Backup successful for {table_name}")
+        logger.info("Backup successful for %s", table_name)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Backup error for {table_name}: {str(e)}", exc_info=True)
+        logger.error("Backup error for %s: %s", table_name, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@app.get("/backup/{table_name}/catalog")
+def api_backup_catalog_endpoint(table_name: str, valid: bool = Depends(validate_api_key)):
+    from backup_restore import get_backup_catalog
+
+    catalog = get_backup_catalog(table_name)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"No incremental backup exists for {table_name}")
+    return catalog
+
 @app.post("/restore/{table_name}")
-def api_restore_table_endpoint(table_name: str, valid: bool = Depends(validate_api_key)):
-    logger.info(f"Starting restore for table: {table_name}")
+def api_restore_table_endpoint(
+    table_name: str,
+    mode: str = Query("replace"),
+    upto: Optional[int] = Query(None, ge=0),
+    valid: bool = Depends(validate_api_key),
+    slot: None = Depends(admit("backup"))
+):
+    logger.info("Starting restore for table: %s (mode: %s)", table_name, mode)
+    from backup_restore import restore_table
+
     try:
-        result = restore_table(table_name)
+        result = restore_table(table_name, mode, upto=upto)
         if "error" in result:
-            logger.error(f"Restore failed for {table_name}: {result['error']}")
+            logger.error("Restore failed for %s: %s", table_name, result['error'])
             raise HTTPException(status_code=400, detail=result["error"])
-        logger.info(f"Restore successful for {table_name}")
+        logger.info("Restore successful for %s", table_name)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Restore error for {table_name}: {str(e)}", exc_info=True)
+        logger.error("Restore error for %s: %s", table_name, e, exc_info=True)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-# Reporting Endpoints
-@app.get("/hired-employees-by-quarter/")
-def get_hired_employees_by_quarter_endpoint():
-    logger.info("Generating hired employees by quarter report")
+@app.post("/restore-range/{table_name}")
+def api_restore_range_endpoint(
+    table_name: str,
+    start_id: int = Query(..., ge=1),
+    end_id: int = Query(..., ge=1),
+    source: str = Query("full"),
+    valid: bool = Depends(validate_api_key),
+    slot: None = Depends(admit("backup"))
+):
+    logger.info("Starting range restore for table: %s (ids %s-%s, source: %s)", table_name, start_id, end_id, source)
+    from backup_restore import restore_id_range
+
     try:
-        result = hired_employees_by_quarter()
-        store_results_in_db("hired_employees_by_quarter", result, result[0].keys())
-        logger.debug("Report generated successfully")
+        result = restore_id_range(table_name, start_id, end_id, source)
+        if "error" in result:
+            logger.error("Range restore failed for %s: %s", table_name, result['error'])
+            raise HTTPException(status_code=400, detail=result["error"])
+        logger.info("Range restore successful for %s: %s rows", table_name, result['rows'])
         return result
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Report generation error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Error generating report")
+        logger.error("Range restore error for %s: %s", table_name, e, exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# Change feed: events after `since` as NDJSON (one JSON object per line, ordered by seq)
+@app.get("/changes")
+def changes_endpoint(
+    since: int = Query(0, ge=0),
+    limit: int = Query(10000, ge=1, le=100000),
+    table: Optional[str] = Query(None),
+    valid: bool = Depends(validate_api_key)
+):
+    logger.info("Streaming changes since %s (table: %s, limit: %s)", since, table, limit)
+    return StreamingResponse(stream_changes(SessionLocal, since, limit, table), media_type="application/x-ndjson")
+
+# Admission control stats (queue depth and wait times of the heavy endpoint classes)
+@app.get("/admission/stats")
+def admission_stats_endpoint(valid: bool = Depends(validate_api_key)):
+    return {"classes": get_admission_stats(), "heavy_db_pool": heavy_engine.pool.status()}
+
+# Reporting Endpoints
+# The ETag is checked on the CRUD pool first: a 304 takes neither a report slot nor a heavy
+# connection. Only a report that must be computed is admitted, and it runs its queries and
+# stores its results on a single heavy session.
+def compute_report(name, report, response, etag):
+    with HeavySessionLocal() as db:
+        try:
+            result = report(db)
+            store_results_in_db(name, result, result[0].keys(), db)
+            logger.debug("Report generated successfully")
+            set_etag(response, etag)
+            return result
+        except Exception as e:
+            logger.error("Report generation error: %s", e, exc_info=True)
+            raise HTTPException(status_code=500, detail="Error generating report")
+
+async def report_etag(db, name):
+    try:
+        return make_etag(await run_in_threadpool(get_table_versions, db, REPORT_TABLES), name)
+    finally:
+        await run_in_threadpool(db.close)  # libera la conexión CRUD antes de esperar un slot
+
+@app.get("/hired-employees-by-quarter/")
+async def get_hired_employees_by_quarter_endpoint(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    logger.info("Generating hired employees by quarter report")
+    etag = await report_etag(db, "hired_employees_by_quarter")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    async with admitted("report"):
+        return await run_in_threadpool(compute_report, "hired_employees_by_quarter", hired_employees_by_quarter, response, etag)
 
 @app.get("/departments-above-average/")
-def get_departments_above_average_endpoint():
+async def get_departments_above_average_endpoint(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     logger.info("Generating departments above average report")
-    try:
-        result = departments_above_average()
-        store_results_in_db("departments_above_average", result, result[0].keys())
-        logger.debug("Report generated successfully")
-        return result
-    except Exception as e:
-        logger.error(f"Report generation error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Error generating report")
+    etag = await report_etag(db, "departments_above_average")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    async with admitted("report"):
+        return await run_in_threadpool(compute_report, "departments_above_average", departments_above_average, response, etag)
 
 if __name__ == "__main__":
     logger.info("Starting API server")
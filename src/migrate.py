@@ -0,0 +1,16 @@
+# migrate.py
+"""
+Creates the database schema before the API starts.
+
+Usage:
+    python src/migrate.py
+"""
+from database import init_db
+from logger import setup_logger
+
+logger = setup_logger("app.migrate")
+
+if __name__ == "__main__":
+    logger.info("Creating database schema")
+    init_db()
+    logger.info("Database schema ready")
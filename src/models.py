@@ -1,10 +1,20 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel
 
 # Create the base for the models
 Base = declarative_base()
 
+# Tables that hold migrated data (backups, restores and loads)
+DATA_TABLES = ["hired_employees", "departments", "jobs"]
+
+# Column order of the headerless CSV files of each table
+TABLE_COLUMNS = {
+    "hired_employees": ["id", "name", "datetime", "department_id", "job_id"],
+    "departments": ["id", "department"],
+    "jobs": ["id", "job"],
+}
+
 # Model for the hired_employees table
 class HiredEmployee(Base):
     __tablename__ = 'hired_employees'
@@ -38,6 +48,30 @@ class Job(Base):
     def __repr__(self):
         return f"<Job(id={self.id}, job={self.job})>"
     
+# Model for the table_versions table (one counter per data table, used for ETags)
+class TableVersion(Base):
+    __tablename__ = 'table_versions'
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TableVersion(table_name={self.table_name}, version={self.version})>"
+    
+# Model for the change_log table (append-only feed of data changes, read by /changes)
+class ChangeLog(Base):
+    __tablename__ = 'change_log'
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    operation = Column(String, nullable=False)
+    row_id = Column(Integer)
+    data = Column(Text)
+    changed_at = Column(String, nullable=False)
+
+    def __repr__(self):
+        return f"<ChangeLog(seq={self.seq}, table_name={self.table_name}, operation={self.operation}, row_id={self.row_id})>"
+    
 class EmployeeCreate(BaseModel):
     name: str
     datetime: str
@@ -0,0 +1,223 @@
+# search.py
+import re
+from typing import Iterable, List
+
+from sqlalchemy import text
+
+# SQLite: tabla FTS5 con tokenizer trigram, rowid = hired_employees.id (se sincroniza desde las escrituras)
+SEARCH_TABLE = "employee_search"
+# SQLite: índice B-tree sobre name sin distinguir mayúsculas; sirve la etapa de prefijo ya ordenada
+NAME_INDEX = "ix_hired_employees_name_nocase"
+# PostgreSQL: índice GiST pg_trgm sobre hired_employees.name (lo mantiene la propia base);
+# a diferencia de GIN también sirve el ORDER BY por distancia de trigramas
+TRGM_INDEX = "ix_hired_employees_name_gist_trgm"
+# Índice GIN de versiones anteriores, se reemplaza por el GiST
+LEGACY_TRGM_INDEX = "ix_hired_employees_name_trgm"
+
+# El tokenizer trigram necesita al menos 3 caracteres para usar el índice
+MIN_QUERY_LENGTH = 3
+
+# Filas candidatas leídas por etapa: acota lo que se lee y se puntúa en Python. Ningún
+# plan ordena todas las coincidencias antes del LIMIT (los términos frecuentes coinciden
+# con media tabla): el prefijo sale en el orden del índice, las etapas FTS5 sin ordenar
+CANDIDATES = 1000
+
+# Límite superior del rango de prefijo: name < q || U+10FFFF
+_PREFIX_END = "\U0010FFFF"
+
+# Similitud mínima de una coincidencia difusa (el umbral por defecto de pg_trgm)
+FUZZY_THRESHOLD = 0.3
+
+PREFIX, SUBSTRING, FUZZY = "prefix", "substring", "fuzzy"
+
+_COLUMNS = "h.id, h.name, h.datetime, h.department_id, h.job_id"
+
+def _is_sqlite(conn) -> bool:
+    dialect = conn.get_bind().dialect if hasattr(conn, "get_bind") else conn.dialect
+    return dialect.name == "sqlite"
+
+def create_search_index(conn) -> None:
+    """
+    Creates the name search index and fills it with the existing employees.
+
+    Args:
+        conn: Connection with an open transaction
+    """
+    if _is_sqlite(conn):
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": SEARCH_TABLE}).first()
+        if not exists:
+            conn.execute(text(f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(name, tokenize='trigram')"))
+            rebuild_search_index(conn)
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {NAME_INDEX} ON hired_employees (name COLLATE NOCASE)"))
+    else:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        rebuild_search_index(conn)
+
+def _select_names(where: str = "") -> str:
+    return (f"INSERT INTO {SEARCH_TABLE} (rowid, name) SELECT id, name FROM hired_employees "
+            f"WHERE name IS NOT NULL {where}")
+
+def rebuild_search_index(conn) -> None:
+    """
+    Rebuilds the index from hired_employees (after a restore that replaced the table).
+
+    The name indexes belong to the table, so a swapped-in table only needs them to
+    be created again.
+    """
+    if _is_sqlite(conn):
+        conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        conn.execute(text(_select_names()))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {NAME_INDEX} ON hired_employees (name COLLATE NOCASE)"))
+    else:
+        conn.execute(text(f"DROP INDEX IF EXISTS {LEGACY_TRGM_INDEX}"))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON hired_employees USING gist (name gist_trgm_ops)"))
+
+def index_employees(conn, ids: Iterable[int], names: Iterable[str], replace: bool = True) -> None:
+    """
+    Adds or replaces the names of the given employees in the index.
+
+    Must run in the same transaction as the write to hired_employees (no-op on PostgreSQL).
+    replace=False skips the DELETE for ids that cannot be indexed yet (a new row).
+    """
+    if not _is_sqlite(conn):
+        return
+    rows = [{"id": int(employee_id), "name": name} for employee_id, name in zip(ids, names)]
+    if rows:
+        if replace:
+            conn.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), rows)
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE} (rowid, name) VALUES (:id, :name)"), rows)
+
+def unindex_employees(conn, ids: Iterable[int]) -> None:
+    """Removes employees from the index (no-op on PostgreSQL)."""
+    if not _is_sqlite(conn):
+        return
+    rows = [{"id": int(employee_id)} for employee_id in ids]
+    if rows:
+        conn.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), rows)
+
+def reindex_id_range(conn, start_id: int, end_id: int) -> None:
+    """Re-reads an id range of hired_employees into the index (after a range restore)."""
+    if not _is_sqlite(conn):
+        return
+    params = {"start_id": start_id, "end_id": end_id}
+    conn.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid BETWEEN :start_id AND :end_id"), params)
+    conn.execute(text(_select_names("AND id BETWEEN :start_id AND :end_id")), params)
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _fts_phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+def _trigrams(value: str) -> List[str]:
+    value = value.casefold()
+    return list(dict.fromkeys(value[i:i + 3] for i in range(len(value) - 2)))
+
+def _word_trigrams(value: str) -> set:
+    """Trigramas de cada palabra con el relleno de pg_trgm ("  juan ")."""
+    return {trigram for word in re.findall(r"\w+", value) for trigram in _trigrams(f"  {word} ")}
+
+def name_similarity(q: str, name: str) -> float:
+    """
+    Similitud de trigramas (la de pg_trgm) entre q y el tramo de palabras del nombre
+    que mejor coincide, así "Quispe" puntúa igual en "Quispe" que en "Ana Quispe Rojas".
+    """
+    target = _word_trigrams(q)
+    words = re.findall(r"\w+", name)
+    size = max(1, len(re.findall(r"\w+", q)))
+    best = 0.0
+    for i in range(max(1, len(words) - size + 1)):
+        span = _word_trigrams(" ".join(words[i:i + size]))
+        if target and span:
+            best = max(best, len(target & span) / len(target | span))
+    return best
+
+def _fuzzy_query(q: str) -> str:
+    """
+    Consulta FTS5 de la etapa difusa: nombres con dos trigramas consecutivos de q.
+
+    Un error de tipeo rompe como mucho tres trigramas, así que los pares lejos del
+    error siguen coincidiendo; exigir pares en lugar de trigramas sueltos deja fuera
+    la mayoría de los nombres que solo comparten una sílaba frecuente.
+    """
+    trigrams = _trigrams(q)
+    if len(trigrams) < 3:
+        return " OR ".join(_fts_phrase(trigram) for trigram in trigrams)
+    return " OR ".join(f"({_fts_phrase(a)} AND {_fts_phrase(b)})" for a, b in zip(trigrams, trigrams[1:]))
+
+def _candidates_sqlite(db, stage: str, q: str) -> list:
+    if not _trigrams(q):  # sin trigramas la consulta FTS5 quedaría vacía ('' o '""') y es un error de sintaxis
+        return []
+    if stage == PREFIX:
+        # Rango del índice NOCASE en su orden: el nombre igual a q va primero y luego los que
+        # lo extienden, sin leer más de CANDIDATES entradas aunque coincida media tabla
+        return db.execute(text(
+            f"SELECT {_COLUMNS} FROM hired_employees h "
+            f"WHERE h.name >= :q COLLATE NOCASE AND h.name < :end COLLATE NOCASE "
+            f"ORDER BY h.name COLLATE NOCASE LIMIT :candidates"
+        ), {"q": q, "end": q + _PREFIX_END, "candidates": CANDIDATES}).mappings().all()
+    if stage == SUBSTRING:
+        query = _fts_phrase(q)  # con el tokenizer trigram, la frase coincide con los nombres que contienen q
+    else:
+        query = _fuzzy_query(q)
+    return db.execute(text(
+        f"SELECT {_COLUMNS} FROM {SEARCH_TABLE} s JOIN hired_employees h ON h.id = s.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH :query LIMIT :candidates"
+    ), {"query": query, "candidates": CANDIDATES}).mappings().all()
+
+def _candidates_postgres(db, stage: str, q: str) -> list:
+    # El orden por distancia (KNN sobre el índice GiST) va antes del LIMIT: quedan los nombres más parecidos a q
+    if stage == FUZZY:
+        condition, order, params = "(h.name % :q OR :q <% h.name)", ":q <<-> h.name", {"q": q}
+    else:
+        pattern = _like_escape(q) + "%"
+        condition, order = "h.name ILIKE :pattern", "h.name <-> :q"
+        params = {"q": q, "pattern": pattern if stage == PREFIX else "%" + pattern}
+    return db.execute(text(
+        f"SELECT {_COLUMNS} FROM hired_employees h WHERE {condition} ORDER BY {order} LIMIT :candidates"
+    ), {**params, "candidates": CANDIDATES}).mappings().all()
+
+def search_employees(db, q: str, limit: int = 20, fuzzy: bool = True) -> list:
+    """
+    Ranked name search: names starting with q first, then names containing q,
+    then (if fuzzy) names sharing trigrams with q.
+
+    Each stage reads at most CANDIDATES rows from an index and only runs if the previous
+    ones returned fewer than `limit` results; inside a stage the rows are ordered by
+    name_similarity to q. Prefix candidates come in index order (SQLite) or by trigram
+    distance (PostgreSQL), so an exact name is always among them.
+
+    Args:
+        db: Database session
+        q: Text to search (at least MIN_QUERY_LENGTH characters once stripped; shorter returns [])
+        limit: Maximum number of results
+        fuzzy: Include approximate matches
+
+    Returns:
+        list: Employees with `match` (prefix, substring or fuzzy) and `score`
+    """
+    q = q.strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        return []
+    candidates = _candidates_sqlite if _is_sqlite(db) else _candidates_postgres
+    stages = [PREFIX, SUBSTRING] + ([FUZZY] if fuzzy else [])
+    results = []
+    found = set()
+
+    for stage in stages:
+        if len(results) >= limit:
+            break
+        scored = []
+        for row in candidates(db, stage, q):
+            if row["id"] in found:
+                continue
+            score = name_similarity(q, row["name"] or "")
+            if stage == FUZZY and score < FUZZY_THRESHOLD:
+                continue
+            scored.append({**row, "match": stage, "score": round(score, 4)})
+        scored.sort(key=lambda row: (-row["score"], len(row["name"]), row["id"]))
+        for row in scored[:limit - len(results)]:
+            results.append(row)
+            found.add(row["id"])
+
+    return results
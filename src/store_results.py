@@ -1,14 +1,21 @@
+from contextlib import nullcontext
 from sqlalchemy import Table, Column, Integer, String, MetaData, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from database import engine
+from database import heavy_engine as engine  # pool separado del de la API CRUD
 
-def store_results_in_db(table_name, data, columns):
-    metadata = MetaData()
-    metadata.reflect(bind=engine)
-    
-    with Session(engine) as session:
+def store_results_in_db(table_name, data, columns, session=None):
+    # session: la del reporte (una sola conexión por reporte); sin ella se abre una en el pool pesado
+    own_session = session is None
+    if own_session:
+        session = Session(engine)
+
+    with session if own_session else nullcontext():  # cierra solo la sesión propia
         try:
+            conn = session.connection()
+            metadata = MetaData()
+            metadata.reflect(bind=conn)
+
             print(f"Processing table: {table_name}")
             
             # Convert column names to lowercase to match PostgreSQL behavior
@@ -21,8 +28,8 @@ def store_results_in_db(table_name, data, columns):
             if table_name in metadata.tables:
                 print(f"Dropping existing table: {table_name}")
                 table = metadata.tables[table_name]
-                table.drop(engine)  # Properly drop the table using SQLAlchemy
-                metadata.reflect(bind=engine)  # Refresh metadata
+                table.drop(conn)  # Properly drop the table using SQLAlchemy
+                metadata.reflect(bind=conn)  # Refresh metadata
             
             # Ensure 'id' column is not duplicated
             if "id" in columns:
@@ -37,8 +44,8 @@ def store_results_in_db(table_name, data, columns):
                 *(Column(col, Integer) if isinstance(data[0].get(col, ""), int) else Column(col, String) for col in columns),
                 extend_existing=True  # Allow redefinition if necessary
             )
-            metadata.create_all(engine)
-            metadata.reflect(bind=engine)  # Refresh metadata
+            metadata.create_all(conn)
+            metadata.reflect(bind=conn)  # Refresh metadata
             
             # Insert the new data using individual execution
             columns_str = ', '.join(columns)
@@ -53,5 +60,3 @@ def store_results_in_db(table_name, data, columns):
         except SQLAlchemyError as e:
             session.rollback()
             print(f"Error storing data in {table_name}: {e}")
-        finally:
-            session.close()
\ No newline at end of file
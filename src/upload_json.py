@@ -1,18 +1,18 @@
 import os
 import json
-import logging
 import pandas as pd
 
 from core import DATA_FOLDER
 from database import engine, SessionLocal
 from validators import validate_record 
 from models import HiredEmployee
+from versioning import bump_table_version
+from changes import record_change, BULK_INSERT
+from search import index_employees
+from logger import setup_logger
 
-# Configure logging
-logging.basicConfig(filename='data_load.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# data folder
-os.makedirs(DATA_FOLDER, exist_ok=True)
+logger = setup_logger("app.loader")
+reject_logger = setup_logger("app.loader.rejects")
 
 def load_json_to_db(json_file, table_name, db): 
     try:
@@ -31,15 +31,20 @@ def load_json_to_db(json_file, table_name, db):
             if not errors:
                 valid_records.append(record)
             else:
-                logging.warning(f"Registro inválido en JSON ({table_name}): {errors}")
+                reject_logger.warning("Registro inválido en JSON (%s): %s", table_name, errors)
 
         if valid_records:
             df_valid = pd.DataFrame(valid_records)
-            df_valid.to_sql(table_name, con=engine, if_exists='append', index=False)  
-            logging.info(f"{len(valid_records)} registros válidos insertados en {table_name}.")
+            with engine.begin() as conn:
+                df_valid.to_sql(table_name, con=conn, if_exists='append', index=False)
+                bump_table_version(conn, table_name)
+                record_change(conn, table_name, BULK_INSERT, data={"ids": [int(i) for i in df_valid["id"]]})
+                if table_name == "hired_employees":
+                    index_employees(conn, df_valid["id"], df_valid["name"])
+            logger.info("%s registros válidos insertados en %s.", len(valid_records), table_name)
 
         return {"message": f"{len(valid_records)} registros insertados exitosamente."}
 
     except Exception as e:
-        logging.error(f"Error cargando {table_name} desde {json_file}: {str(e)}")
+        logger.error("Error cargando %s desde %s: %s", table_name, json_file, e)
         return {"error": str(e)}
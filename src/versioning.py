@@ -0,0 +1,74 @@
+# versioning.py
+import hashlib
+from typing import Dict, Iterable
+
+from fastapi import Request, Response
+from sqlalchemy import select, text
+
+from models import TableVersion
+
+# Un solo statement para SQLite y PostgreSQL (ON CONFLICT existe en ambos)
+_BUMP_VERSION = text(
+    "INSERT INTO table_versions (table_name, version) VALUES (:table_name, 1) "
+    "ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1"
+)
+
+def bump_table_version(conn, table_name: str) -> None:
+    """
+    Increments the data version of a table.
+
+    Must be called inside the same transaction that modifies the table, so the
+    new version becomes visible together with the data.
+
+    Args:
+        conn: Session or Connection with an open transaction
+        table_name: Name of the modified table
+    """
+    conn.execute(_BUMP_VERSION, {"table_name": table_name})
+
+def get_table_versions(db, table_names: Iterable[str]) -> Dict[str, int]:
+    """
+    Returns the current data version of each table (0 if it was never written).
+
+    Args:
+        db: Database session
+        table_names: Tables the resource depends on
+
+    Returns:
+        dict: table_name -> version
+    """
+    table_names = list(table_names)
+    versions = {name: 0 for name in table_names}
+    rows = db.execute(
+        select(TableVersion.table_name, TableVersion.version)
+        .where(TableVersion.table_name.in_(table_names))
+    ).all()
+    versions.update({name: version for name, version in rows})
+    return versions
+
+def make_etag(versions: Dict[str, int], *params) -> str:
+    """Builds a weak ETag from the table versions and the request parameters."""
+    raw = "|".join(f"{name}:{version}" for name, version in sorted(versions.items()))
+    raw += "|" + "|".join(str(param) for param in params)
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Checks the If-None-Match header using weak comparison."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def set_etag(response: Response, etag: str) -> None:
+    """Adds the ETag to the response and forces clients to revalidate it."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a resource whose ETag did not change."""
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
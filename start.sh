@@ -1,4 +1,4 @@
 #!/bin/bash
-uvicorn main:app --host 0.0.0.0 --port 10000
+python src/migrate.py && uvicorn main:app --host 0.0.0.0 --port 10000
 
 chmod +x start.sh
\ No newline at end of file
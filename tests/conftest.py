@@ -0,0 +1,38 @@
+# conftest.py
+"""
+Test setup: a throwaway SQLite database (or TEST_DATABASE_URL, e.g. a PostgreSQL
+test database) and the same import paths as the Docker image.
+
+The environment is set before any application module is imported, because
+`core` and `database` read it at import time.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+for path in (ROOT_DIR / "src", ROOT_DIR, ROOT_DIR / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+TMP_DIR = Path(tempfile.mkdtemp(prefix="api_tests_"))
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{TMP_DIR / 'app.db'}")
+os.environ["API_KEY"] = "test"
+os.environ["LOG_DIR"] = str(TMP_DIR / "logs")
+os.environ["DATA_FOLDER"] = str(TMP_DIR / "data")
+(TMP_DIR / "data").mkdir()
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """Runs the migration step once and returns the engine."""
+    from database import engine, init_db
+
+    init_db()
+    return engine
+
+@pytest.fixture
+def tmp_data_dir():
+    return TMP_DIR / "data"
@@ -0,0 +1,46 @@
+# test_arrow_loader.py
+import logging
+
+import pytest
+from sqlalchemy import text
+
+pytest.importorskip("pyarrow")
+
+import arrow_loader
+
+class RejectedLines(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.args[1])
+
+@pytest.fixture
+def rejected_lines():
+    handler = RejectedLines()
+    arrow_loader.reject_logger.addHandler(handler)
+    yield handler.lines
+    arrow_loader.reject_logger.removeHandler(handler)
+
+def test_integer_outside_int64_rejects_only_its_line(migrated_db, tmp_path, rejected_lines):
+    from database import SessionLocal
+
+    with migrated_db.begin() as conn:
+        conn.execute(text("DELETE FROM hired_employees"))
+    csv_file = tmp_path / "hired_employees.csv"
+    csv_file.write_text(
+        "1,Ana Ruiz,2021-02-01T10:00:00Z,1,1\n"
+        "99999999999999999999,Too Big,2021-02-01T10:00:00Z,1,1\n"
+        "3,Luis Paz,2021-03-01T10:00:00Z,9223372036854775808,1\n"
+        "9223372036854775807,Max Id,2021-04-01T10:00:00Z,2,2\n"
+    )
+
+    with SessionLocal() as db:
+        result = arrow_loader.load_csv_arrow(csv_file, "hired_employees", db)
+
+    assert "error" not in result
+    assert rejected_lines == [2, 3]
+    with migrated_db.connect() as conn:
+        ids = conn.execute(text("SELECT id FROM hired_employees ORDER BY id")).scalars().all()
+    assert ids == [1, 2 ** 63 - 1]
@@ -0,0 +1,57 @@
+# test_backup_incremental.py
+import os
+
+import pytest
+from sqlalchemy import text
+
+import backup_restore
+from changes import record_change, INSERT, UPDATE
+
+TABLE = "jobs"
+
+@pytest.fixture
+def chain(migrated_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(backup_restore, "BACKUP_DIR", str(tmp_path))
+    with migrated_db.begin() as conn:
+        conn.execute(text(f"DELETE FROM {TABLE}"))
+    return migrated_db
+
+def _write(engine, sql, operation, row_id):
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+        record_change(conn, TABLE, operation, row_id)
+
+def _rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT id, job FROM {TABLE} ORDER BY id")).all()
+
+def test_delta_includes_rows_at_or_below_the_watermark(chain):
+    _write(chain, f"INSERT INTO {TABLE} (id, job) VALUES (10, 'a')", INSERT, 10)
+    _write(chain, f"INSERT INTO {TABLE} (id, job) VALUES (50, 'b')", INSERT, 50)
+    assert backup_restore.backup_table_incremental(TABLE)["entry"]["kind"] == "base"
+
+    # id explícito bajo el watermark, actualización de una fila ya respaldada y una fila nueva
+    _write(chain, f"INSERT INTO {TABLE} (id, job) VALUES (20, 'c')", INSERT, 20)
+    _write(chain, f"UPDATE {TABLE} SET job = 'a2' WHERE id = 10", UPDATE, 10)
+    _write(chain, f"INSERT INTO {TABLE} (id, job) VALUES (60, 'd')", INSERT, 60)
+    entry = backup_restore.backup_table_incremental(TABLE)["entry"]
+    assert entry["kind"] == "delta" and entry["rows"] == 3
+
+    expected = _rows(chain)
+    with chain.begin() as conn:
+        conn.execute(text(f"DELETE FROM {TABLE}"))
+    assert "error" not in backup_restore.restore_table_chain(TABLE)
+    assert _rows(chain) == expected
+
+def test_failed_new_base_keeps_the_previous_chain(chain, monkeypatch):
+    _write(chain, f"INSERT INTO {TABLE} (id, job) VALUES (1, 'a')", INSERT, 1)
+    backup_restore.backup_table_incremental(TABLE)
+    before = sorted(os.listdir(backup_restore._chain_dir(TABLE)))
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(backup_restore, "_write_avro_file", fail)
+    assert "error" in backup_restore.backup_table_incremental(TABLE, new_base=True)
+
+    assert sorted(os.listdir(backup_restore._chain_dir(TABLE))) == before
+    assert os.listdir(backup_restore.BACKUP_DIR) == [f"{TABLE}.chain"]
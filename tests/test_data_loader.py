@@ -0,0 +1,52 @@
+# test_data_loader.py
+import logging
+
+import pytest
+from sqlalchemy import text
+
+import data_loader
+
+class RejectedLines(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.args[2])
+
+@pytest.fixture
+def rejected_lines():
+    handler = RejectedLines()
+    data_loader.reject_logger.addHandler(handler)
+    yield handler.lines
+    data_loader.reject_logger.removeHandler(handler)
+
+@pytest.fixture
+def jobs_csv(migrated_db, tmp_path):
+    with migrated_db.begin() as conn:
+        conn.execute(text("DELETE FROM jobs"))
+    # Líneas 7, 130 y 299 sin cargo; la 200 vacía (se ignora)
+    lines = [f"{i}," if i in (7, 130, 299) else "" if i == 200 else f"{i},Job {i}" for i in range(1, 301)]
+    path = tmp_path / "jobs.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+def test_split_ranges_cover_the_file_on_line_boundaries(jobs_csv):
+    content = jobs_csv.read_bytes()
+    ranges = data_loader._split_ranges(jobs_csv, range_size=500)
+
+    assert len(ranges) > 2
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start and content[end - 1:end] == b"\n"
+
+def test_parallel_load_logs_rejects_with_file_line_numbers(migrated_db, jobs_csv, rejected_lines):
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        result = data_loader.load_csv_parallel(jobs_csv, "jobs", db, workers=2, range_size=500)
+
+    assert result["rejected"] == 3 and result["ranges"] > 2
+    assert rejected_lines == [7, 130, 299]
+    with migrated_db.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM jobs")).scalar() == 296
@@ -0,0 +1,83 @@
+# test_logger.py
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import logger as app_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.setFormatter(app_logging.JsonFormatter())
+        self.lines = []
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        self.lines.append(json.loads(self.format(record)))
+
+
+@pytest.fixture
+def pipeline():
+    """Restarts the pipeline with the given handlers; restores the default one afterwards."""
+    def start(*handlers):
+        app_logging.stop_logging()
+        app_logging.start_logging(handlers=list(handlers))
+    yield start
+    app_logging.stop_logging()
+    app_logging.start_logging()
+
+
+def test_message_is_rendered_when_logged(pipeline):
+    handler = ListHandler()
+    pipeline(handler)
+    payload = {"step": 1}
+    app_logging.setup_logger("app.test").info("payload %s", payload)
+    payload["step"] = 2  # cambia antes de que el listener escriba
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        app_logging.setup_logger("app.test").exception("failed")
+    app_logging.stop_logging()
+
+    assert handler.lines[0]["message"] == "payload {'step': 1}"
+    assert "ValueError: boom" in handler.lines[1]["exception"]
+
+
+def test_full_queue_drops_and_counts(pipeline, monkeypatch):
+    monkeypatch.setattr(app_logging, "LOG_QUEUE_SIZE", 2)
+    release = threading.Event()
+    handler = ListHandler(release)
+    pipeline(handler)
+    log = app_logging.setup_logger("app.test")
+    for i in range(10):
+        log.warning("record %s", i)
+    dropped = app_logging.dropped_records()
+    release.set()
+    app_logging._queue_handler.queue.join()  # espera a que el listener vacíe la cola
+    log.warning("after")
+    app_logging.stop_logging()
+
+    # la cola guarda dos (más el que el listener tenga en curso); el resto se descarta
+    assert dropped >= 7
+    assert handler.lines[-1]["message"] == "after"
+    assert sum(line.get("queue_dropped", 0) for line in handler.lines) == dropped
+
+
+def test_worker_records_go_to_the_parent_pipeline(pipeline):
+    handler = ListHandler()
+    pipeline(handler)
+    worker_logger = logging.getLogger("app.worker")
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=app_logging.init_worker_logging,
+                             initargs=(app_logging.worker_log_queue(),)) as pool:
+        pool.submit(worker_logger.warning, "from the %s", "worker").result()
+    app_logging.stop_logging()
+
+    assert [line["message"] for line in handler.lines if line["logger"] == "app.worker"] == ["from the worker"]
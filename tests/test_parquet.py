@@ -0,0 +1,47 @@
+# test_parquet.py
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from data_loader import load_parquet_to_db
+
+def _employees(datetimes, datetime_type):
+    return pa.table({
+        "id": pa.array(range(1, len(datetimes) + 1), pa.int64()),
+        "name": ["Ana Ruiz", "Luis Paz"][:len(datetimes)],
+        "datetime": pa.array(datetimes, datetime_type),
+        "department_id": pa.array([1] * len(datetimes), pa.int64()),
+        "job_id": pa.array([1] * len(datetimes), pa.int64()),
+    })
+
+def _load(migrated_db, tmp_path, table):
+    from database import SessionLocal
+
+    with migrated_db.begin() as conn:
+        conn.execute(text("DELETE FROM hired_employees"))
+    parquet_file = tmp_path / "hired_employees.parquet"
+    pq.write_table(table, parquet_file)
+    with SessionLocal() as db:
+        assert "error" not in load_parquet_to_db(parquet_file, "hired_employees", db)
+    with migrated_db.connect() as conn:
+        return conn.execute(text("SELECT datetime FROM hired_employees ORDER BY id")).scalars().all()
+
+def test_non_utc_timestamps_are_stored_in_utc(migrated_db, tmp_path):
+    from zoneinfo import ZoneInfo
+
+    bogota = ZoneInfo("America/Bogota")  # UTC-5
+    table = _employees(
+        [datetime(2021, 11, 7, 2, 48, 42, tzinfo=bogota), datetime(2021, 12, 31, 21, 0, 0, tzinfo=bogota)],
+        pa.timestamp("us", tz="America/Bogota"),
+    )
+
+    assert _load(migrated_db, tmp_path, table) == ["2021-11-07T07:48:42Z", "2022-01-01T02:00:00Z"]
+
+def test_naive_timestamps_are_taken_as_utc(migrated_db, tmp_path):
+    table = _employees([datetime(2021, 11, 7, 2, 48, 42)], pa.timestamp("ms"))
+
+    assert _load(migrated_db, tmp_path, table) == ["2021-11-07T02:48:42Z"]
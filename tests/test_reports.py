@@ -0,0 +1,62 @@
+# test_reports.py
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from admission import GATES
+
+@pytest.fixture
+def client(migrated_db):
+    from main import app
+
+    with migrated_db.begin() as conn:
+        for table in ("hired_employees", "departments", "jobs"):
+            conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(text("INSERT INTO departments (id, department) VALUES (1, 'Sales'), (2, 'Legal')"))
+        conn.execute(text("INSERT INTO jobs (id, job) VALUES (1, 'Engineer')"))
+        conn.execute(text(
+            "INSERT INTO hired_employees (id, name, datetime, department_id, job_id) VALUES "
+            "(1, 'Ana', '2021-02-01T10:00:00Z', 1, 1), (2, 'Luis', '2021-05-01T10:00:00Z', 1, 1), "
+            "(3, 'Eva', '2021-08-01T10:00:00Z', 2, 1)"
+        ))
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def heavy_checkouts():
+    """Largest number of heavy pool connections checked out at the same time."""
+    from database import heavy_engine
+
+    state = {"open": 0, "max": 0}
+
+    def checkout(*args):
+        state["open"] += 1
+        state["max"] = max(state["max"], state["open"])
+
+    def checkin(*args):
+        state["open"] -= 1
+
+    event.listen(heavy_engine, "checkout", checkout)
+    event.listen(heavy_engine, "checkin", checkin)
+    yield state
+    event.remove(heavy_engine, "checkout", checkout)
+    event.remove(heavy_engine, "checkin", checkin)
+
+@pytest.mark.parametrize("path", ["/hired-employees-by-quarter/", "/departments-above-average/"])
+def test_report_uses_one_heavy_connection(client, heavy_checkouts, path):
+    response = client.get(path)
+
+    assert response.status_code == 200 and response.json()
+    assert heavy_checkouts["max"] == 1
+
+@pytest.mark.parametrize("path", ["/hired-employees-by-quarter/", "/departments-above-average/"])
+def test_not_modified_skips_admission_and_heavy_pool(client, heavy_checkouts, path):
+    etag = client.get(path).headers["ETag"]
+    admitted = GATES["report"].admitted
+    heavy_checkouts["max"] = 0
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert GATES["report"].admitted == admitted
+    assert heavy_checkouts["max"] == 0
@@ -0,0 +1,138 @@
+# test_search.py
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+
+from crud import create_employee, delete_employee, update_employee
+from data_loader import load_csv_to_db
+from models import EmployeeCreate, HiredEmployee
+from upload_json import load_json_to_db
+from search import CANDIDATES, FUZZY, SUBSTRING, _candidates_sqlite, rebuild_search_index, search_employees
+
+HEADERS = {"X-API-KEY": "test"}
+
+@pytest.fixture
+def empty_employees(migrated_db):
+    with migrated_db.begin() as conn:
+        conn.execute(text("DELETE FROM hired_employees"))
+        rebuild_search_index(conn)
+    return migrated_db
+
+def _names(q):
+    """Names found for q; a mid-name q only matches through the FTS5 index."""
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        return [row["name"] for row in search_employees(db, q, fuzzy=False)]
+
+@pytest.fixture
+def client(migrated_db):
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+def test_exact_match_beyond_the_candidate_limit_ranks_first(migrated_db):
+    from database import SessionLocal
+
+    rows = [{"id": i, "name": f"Maria Lopez {i}", "datetime": "2021-01-01T00:00:00Z", "department_id": 1, "job_id": 1}
+            for i in range(1, int(CANDIDATES * 1.5) + 1)]
+    rows.append({"id": 2000, "name": "Mar", "datetime": "2021-01-01T00:00:00Z", "department_id": 1, "job_id": 1})
+    with migrated_db.begin() as conn:
+        conn.execute(text("DELETE FROM hired_employees"))
+        conn.execute(insert(HiredEmployee), rows)
+        rebuild_search_index(conn)
+
+    with SessionLocal() as db:
+        results = search_employees(db, "Mar", limit=5)
+
+    assert [row["name"] for row in results][:1] == ["Mar"]
+    assert len(results) == 5
+
+@pytest.mark.parametrize("q", ["  ab ", "   ", " \t a"])
+def test_query_too_short_once_stripped_is_a_bad_request(client, q):
+    response = client.get("/employees/search", params={"q": q}, headers=HEADERS)
+
+    assert response.status_code == 400
+
+def test_stages_without_trigrams_do_not_query_the_index(migrated_db):
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        assert search_employees(db, "  ab ") == []
+        assert _candidates_sqlite(db, SUBSTRING, "") == []
+        assert _candidates_sqlite(db, FUZZY, "ab") == []
+
+def test_no_stage_sorts_every_match(migrated_db):
+    """Every stage reads at most CANDIDATES index entries: no plan sorts the matches first."""
+    from database import SessionLocal
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(migrated_db, "before_cursor_execute", capture)
+    try:
+        with SessionLocal() as db:
+            search_employees(db, "Qispe Lopez", limit=20)
+    finally:
+        event.remove(migrated_db, "before_cursor_execute", capture)
+
+    with migrated_db.connect() as conn:
+        plans = [" ".join(str(row[3]) for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+                 for statement, parameters in statements]
+    assert len(plans) == 3
+    assert not any("TEMP B-TREE" in plan for plan in plans), plans
+    assert "ix_hired_employees_name_nocase" in plans[0]
+
+def test_crud_writes_keep_the_index_in_sync(empty_employees):
+    from database import SessionLocal
+
+    fields = {"datetime": "2021-01-01T00:00:00Z", "department_id": 1, "job_id": 1}
+    with SessionLocal() as db:
+        employee_id = create_employee(db, EmployeeCreate(name="Ada Quartzfield", **fields)).id
+    assert _names("artzfie") == ["Ada Quartzfield"]
+
+    with SessionLocal() as db:
+        update_employee(db, employee_id, EmployeeCreate(name="Ada Brightwater", **fields))
+    assert _names("artzfie") == []
+    assert _names("ightwat") == ["Ada Brightwater"]
+
+    with SessionLocal() as db:
+        delete_employee(db, employee_id)
+    assert _names("ightwat") == []
+
+def test_csv_and_json_loads_are_searchable(empty_employees, tmp_path):
+    from database import SessionLocal
+
+    csv_file = tmp_path / "hired_employees.csv"
+    csv_file.write_text("1,Ines Wolfenden,2021-01-01T00:00:00Z,1,1\n2,Omar Wolfsbane,2021-01-01T00:00:00Z,1,1\n")
+    json_file = tmp_path / "hired_employees.json"
+    json_file.write_text(json.dumps([
+        {"id": 3, "name": "Rita Wolfgram", "datetime": "2021-01-01T00:00:00Z", "department_id": 1, "job_id": 1}
+    ]))
+
+    with SessionLocal() as db:
+        assert "error" not in load_csv_to_db(csv_file, "hired_employees", db, mode="chunked")
+        assert "error" not in load_json_to_db(json_file, "hired_employees", db)
+
+    assert sorted(_names("Wolf")) == ["Ines Wolfenden", "Omar Wolfsbane", "Rita Wolfgram"]
+
+def test_endpoint_revalidates_with_etag(client, empty_employees):
+    from database import SessionLocal
+
+    params = {"q": "Quartz"}
+    first = client.get("/employees/search", params=params, headers=HEADERS)
+    assert first.status_code == 200 and first.json()["data"] == []
+
+    cached = client.get("/employees/search", params=params, headers={**HEADERS, "If-None-Match": first.headers["ETag"]})
+    assert cached.status_code == 304
+
+    with SessionLocal() as db:
+        create_employee(db, EmployeeCreate(name="Quartz Mendel", datetime="2021-01-01T00:00:00Z", department_id=1, job_id=1))
+    changed = client.get("/employees/search", params=params, headers={**HEADERS, "If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert [row["name"] for row in changed.json()["data"]] == ["Quartz Mendel"]